@@ -0,0 +1,219 @@
+"""Daily PostgreSQL backups, made by a background thread so no page load waits for pg_dump.
+
+A backup is written under a `.partial` name and renamed when pg_dump succeeds, so an
+interrupted dump is never mistaken for the day's backup.  Creating the partial file (or
+directory) is exclusive, so two processes never dump at the same time.  Retention goes
+by the date in the file names.  Every run is recorded in the `backups` table.
+"""
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import config
+from resources import database
+
+# pg_dump_YYYYMMDD plus the format: .sql.gz from before, .dump[.gz|.zst] (custom), .dir (directory)
+BACKUP_NAME = re.compile(r'^pg_dump_(\d{8})\.(sql\.gz|dump|dump\.gz|dump\.zst|dir)$')
+
+# partial backups older than this are left over from a crash and removed
+STALE_PARTIAL_SECONDS = 12 * 3600
+
+
+def backup_files(directory):
+    """(YYYYMMDD, path) of every complete backup in `directory`, newest first."""
+    backups = []
+    for file_name in os.listdir(directory):
+        match = BACKUP_NAME.match(file_name)
+        if match:
+            backups.append((match.group(1), os.path.join(directory, file_name)))
+    return sorted(backups, reverse=True)
+
+
+def prune(directory, keep):
+    """Delete all but the `keep` newest backups; returns the deleted paths."""
+    deleted = []
+    for _, path in backup_files(directory)[keep:]:
+        _remove(path)
+        deleted.append(path)
+    return deleted
+
+
+def _remove(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def compressor():
+    """The command that compresses a custom-format dump on its way to disk, and its suffix.
+
+    zstd uses every core and is much faster than gzip at a similar ratio; gzip -6 is the fallback.
+    """
+    if shutil.which('zstd'):
+        return ['zstd', '-q', '-T0', '-3'], '.zst'
+    return ['gzip', '-6'], '.gz'
+
+
+def pg_dump_command(fmt, path=None, jobs=1):
+    command = ['pg_dump', '--no-password', '-h', config.POSTGRES_HOST, '-U', config.POSTGRES_USER,
+               '-d', config.POSTGRES_DB]
+    if fmt == 'directory':
+        # one compressed file per table, dumped by `jobs` connections in parallel
+        return command + ['-Fd', '-j', str(jobs), '-Z', '6', '-f', path]
+    # custom format, uncompressed, to stdout; compressor() compresses it in a separate process
+    return command + ['-Fc', '-Z', '0']
+
+
+def _pg_env():
+    return {**os.environ, 'PGPASSWORD': config.POSTGRES_PASSWORD or ''}
+
+
+def _size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+
+def run_backup(directory, fmt='custom', jobs=4, day=None):
+    """Dump the database to `directory` as the backup for `day` (default today).
+
+    Returns {'file', 'bytes', 'seconds'}, or None if another process is already making
+    this backup.  Raises RuntimeError with pg_dump's message if the dump fails.
+    """
+    day = day or datetime.now().strftime('%Y%m%d')
+    os.makedirs(directory, exist_ok=True)
+    started = time.monotonic()
+
+    if fmt == 'directory':
+        final = os.path.join(directory, f'pg_dump_{day}.dir')
+        partial = final + '.partial'
+        try:
+            os.mkdir(partial)
+        except FileExistsError:
+            return None
+        try:
+            result = subprocess.run(pg_dump_command(fmt, partial, jobs), env=_pg_env(),
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            if result.returncode != 0:
+                raise RuntimeError(f'pg_dump failed: {result.stderr.decode(errors="replace").strip()}')
+        except BaseException:
+            _remove(partial)
+            raise
+    else:
+        compress, suffix = compressor()
+        final = os.path.join(directory, f'pg_dump_{day}.dump{suffix}')
+        partial = final + '.partial'
+        try:
+            out = open(partial, 'xb')
+        except FileExistsError:
+            return None
+        try:
+            # pg_dump | compressor > partial, streamed between the two processes
+            with out, tempfile.TemporaryFile() as dump_errors:
+                dump = subprocess.Popen(pg_dump_command(fmt), env=_pg_env(), stdout=subprocess.PIPE, stderr=dump_errors)
+                packer = subprocess.Popen(compress, stdin=dump.stdout, stdout=out, stderr=subprocess.PIPE)
+                # only the compressor holds the pipe now, so pg_dump sees it close if the compressor dies
+                dump.stdout.close()
+                _, packer_errors = packer.communicate()
+                dump.wait()
+                if dump.returncode != 0:
+                    dump_errors.seek(0)
+                    raise RuntimeError(f'pg_dump failed: {dump_errors.read().decode(errors="replace").strip()}')
+                if packer.returncode != 0:
+                    raise RuntimeError(f'{compress[0]} failed: {packer_errors.decode(errors="replace").strip()}')
+        except BaseException:
+            _remove(partial)
+            raise
+
+    os.rename(partial, final)
+    return {'file': final, 'bytes': _size(final), 'seconds': time.monotonic() - started}
+
+
+def remove_stale_partials(directory, max_age=STALE_PARTIAL_SECONDS):
+    now = time.time()
+    for file_name in os.listdir(directory):
+        path = os.path.join(directory, file_name)
+        if file_name.endswith('.partial') and now - os.path.getmtime(path) > max_age:
+            print('removing unfinished backup', path)
+            _remove(path)
+
+
+def record_backup(fmt, started, result=None, error=None):
+    with database().cursor() as cur:
+        cur.execute("""INSERT INTO backups (format, started, finished, file, bytes, seconds, error)
+                       VALUES (%s, %s, NOW(), %s, %s, %s, %s)""",
+                    (fmt, started, result and result['file'], result and result['bytes'],
+                     result and result['seconds'], error))
+
+
+def recent_backups(limit=10):
+    """The latest recorded backup runs, newest first, as dicts."""
+    with database().cursor(dict_rows=True) as cur:
+        cur.execute("""SELECT started, finished, format, file, bytes, seconds, error
+                       FROM backups ORDER BY started DESC LIMIT %s""", (limit,))
+        return cur.fetchall()
+
+
+class BackupScheduler:
+    """Makes the day's backup in a daemon thread, checking every `check_every` seconds.
+
+    `start()` can be called on every page load; only the first call starts the thread.
+    """
+
+    def __init__(self, directory='.', fmt='custom', jobs=4, keep=5, check_every=3600):
+        self.directory = directory
+        self.fmt = fmt
+        self.jobs = jobs
+        self.keep = keep
+        self.check_every = check_every
+        self.lock = threading.Lock()
+        self.thread = None
+        self.running = False
+
+    def start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._loop, name='backups', daemon=True)
+                self.thread.start()
+
+    def run_once(self):
+        """Make today's backup if there isn't one yet and prune old ones; returns the result or None."""
+        today = datetime.now().strftime('%Y%m%d')
+        os.makedirs(self.directory, exist_ok=True)
+        if any(day == today for day, _ in backup_files(self.directory)):
+            return None
+        remove_stale_partials(self.directory)
+
+        started = datetime.now()
+        self.running = True
+        print('creating backup for', today)
+        try:
+            result = run_backup(self.directory, self.fmt, self.jobs, today)
+        except Exception as e:
+            print('backup failed:', e)
+            record_backup(self.fmt, started, error=str(e))
+            raise
+        finally:
+            self.running = False
+        if result is None:
+            # another process is making it
+            return None
+        print(f"finished backup {result['file']}: {result['bytes'] / 1e6:.1f} MB in {result['seconds']:.1f}s")
+        record_backup(self.fmt, started, result)
+        for path in prune(self.directory, self.keep):
+            print('removed old backup', path)
+        return result
+
+    def _loop(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                print('backup scheduler:', e)
+            time.sleep(self.check_every)
@@ -0,0 +1,96 @@
+"""Measure caption flattening, compression and concurrent fetching without the network.
+
+    python bench/bench_captions.py
+    python bench/bench_captions.py --hours 1 5 10 --videos 200 --latency 0.05
+    python bench/bench_captions.py --fixtures captions/   # captions recorded with `captions --record`
+
+Flattening compares the original `sub_to_str`, which grows the text with `string +=`,
+against captions_to_text.  Fetching reads synthetic (or recorded) fixtures through
+FixtureCaptionSource, sleeping `--latency` per fetch to stand in for YouTube, once in a
+loop and once through a CaptionFetcher pool.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from captions import (CaptionFetcher, FixtureCaptionSource, captions_to_text, compress_captions,  # noqa: E402
+                      decompress_captions, record_fixture)
+from synthetic import json_captions  # noqa: E402
+
+
+def sub_to_str(subtitles):
+    # the original implementation, for comparison
+    string = ''
+    if subtitles is None:
+        return None
+    for event in subtitles['events']:
+        if 'segs' in event:
+            for seg in event['segs']:
+                string += seg['utf8']
+    return string.replace('\n', ' ')
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def bench_flatten(hours):
+    captions = json_captions(hours * 3600, seed=hours)
+    old, old_seconds = timed(sub_to_str, captions)
+    new, new_seconds = timed(captions_to_text, captions)
+    assert old == new, 'captions_to_text differs from sub_to_str'
+    _, stamped_seconds = timed(captions_to_text, captions, True)
+    raw = json.dumps(captions).encode('utf-8')
+    compressed, compress_seconds = timed(compress_captions, captions)
+    assert decompress_captions(compressed) == captions
+    print(f'{hours:>3}h  {len(captions["events"]):>7} events  sub_to_str {old_seconds * 1000:8.1f} ms  '
+          f'captions_to_text {new_seconds * 1000:7.1f} ms  with timestamps {stamped_seconds * 1000:7.1f} ms  '
+          f'json {len(raw) / 1024:8.0f} KB -> {len(compressed) / 1024:6.0f} KB '
+          f'({len(raw) / len(compressed):.0f}x, {compress_seconds * 1000:.0f} ms)')
+
+
+def bench_fetch(directory, links, latency, workers, host_concurrency):
+    source = FixtureCaptionSource(directory, latency)
+    _, sequential = timed(lambda: [source.fetch(link) for link in links])
+    fetcher = CaptionFetcher(source, workers, host_concurrency, host_interval=0)
+    results, pooled = timed(lambda: list(fetcher.fetch_many(links)))
+    errors = sum(1 for _, _, error in results if error)
+    print(f'{len(links)} videos at {latency * 1000:.0f} ms each: sequential {sequential:.2f} s, '
+          f'{workers} workers ({host_concurrency} per host) {pooled:.2f} s, {errors} errors')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hours', type=int, nargs='+', default=[1, 3, 10], help='caption lengths to flatten')
+    parser.add_argument('--videos', type=int, default=100, help='synthetic fixtures to fetch')
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds per simulated fetch')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--host-concurrency', type=int, default=8)
+    parser.add_argument('--fixtures', help='fetch the recorded fixtures in this directory instead')
+    args = parser.parse_args()
+
+    for hours in args.hours:
+        bench_flatten(hours)
+
+    if args.fixtures:
+        links = [f'https://www.youtube.com/watch?v={name[:-5]}' for name in sorted(os.listdir(args.fixtures))
+                 if name.endswith('.json')]
+        bench_fetch(args.fixtures, links, args.latency, args.workers, args.host_concurrency)
+        return
+    with tempfile.TemporaryDirectory() as directory:
+        links = [f'https://www.youtube.com/watch?v=video{i:05d}' for i in range(args.videos)]
+        for i, link in enumerate(links):
+            record_fixture(directory, link, json_captions(600, seed=i))
+        bench_fetch(directory, links, args.latency, args.workers, args.host_concurrency)
+
+
+if __name__ == '__main__':
+    main()
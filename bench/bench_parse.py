@@ -0,0 +1,104 @@
+"""Compare the two ways of reading the home feed: page source + BeautifulSoup vs in-browser records.
+
+    python bench/bench_parse.py --sizes 100 1000 5000
+    python bench/bench_parse.py --html youtube_home_page.html
+    python bench/bench_parse.py --browser          # also time the real browser round trips
+
+Without --browser the in-browser side is represented by what Python does with its result:
+decoding the JSON string returned by EXTRACT_VIDEOS_SCRIPT and normalizing the records.
+With --browser the synthetic page is loaded into Chrome and the time to get page_source
+out of the browser and to run the script is measured too.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from scraper import (EXTRACT_VIDEOS_SCRIPT, extract_records_from_html, parse_videos_from_html,  # noqa: E402
+                     parse_videos_from_records)
+from synthetic import home_page_html  # noqa: E402
+
+
+def measure(fn, *args):
+    """Run fn twice: once for wall time, once under tracemalloc for the peak allocation."""
+    started = time.perf_counter()
+    result = fn(*args)
+    seconds = time.perf_counter() - started
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def bench_page(name, html, driver=None):
+    records_json = json.dumps(extract_records_from_html(html))
+
+    html_videos, html_seconds, html_peak = measure(parse_videos_from_html, html)
+    dom_videos, dom_seconds, dom_peak = measure(lambda: parse_videos_from_records(json.loads(records_json)))
+    assert [v['link'] for v in html_videos] == [v['link'] for v in dom_videos]
+
+    row = {'page': name, 'videos': len(html_videos),
+           'html_mb': len(html) / 1e6, 'json_mb': len(records_json) / 1e6,
+           'html_parse_s': html_seconds, 'html_peak_mb': html_peak / 1e6,
+           'dom_parse_s': dom_seconds, 'dom_peak_mb': dom_peak / 1e6}
+
+    if driver is not None:
+        with tempfile.NamedTemporaryFile('w', suffix='.html', delete=False, encoding='utf-8') as f:
+            f.write(html)
+        driver.get('file://' + f.name)
+        started = time.perf_counter()
+        driver.page_source
+        row['browser_page_source_s'] = time.perf_counter() - started
+        started = time.perf_counter()
+        driver.execute_script(EXTRACT_VIDEOS_SCRIPT)
+        row['browser_script_s'] = time.perf_counter() - started
+        os.remove(f.name)
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--html', help='benchmark a saved home page (see SAVE_HOME_PAGE_HTML) instead')
+    parser.add_argument('--browser', action='store_true', help='also time page_source and the script in Chrome')
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    driver = None
+    if args.browser:
+        from selenium import webdriver
+        options = webdriver.ChromeOptions()
+        options.add_argument('--headless=new')
+        driver = webdriver.Chrome(options=options)
+
+    pages = []
+    if args.html:
+        with open(args.html, encoding='utf-8') as f:
+            pages.append((os.path.basename(args.html), f.read()))
+    else:
+        pages = [(f'synthetic-{n}', home_page_html(n)) for n in args.sizes]
+
+    rows = []
+    try:
+        for name, html in pages:
+            row = bench_page(name, html, driver)
+            rows.append(row)
+            print('  '.join(f'{k}={v:.3f}' if isinstance(v, float) else f'{k}={v}' for k, v in row.items()))
+    finally:
+        if driver is not None:
+            driver.quit()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""A local stand-in for YouTube's channel feeds, for exercising the feed import offline.
+
+    python bench/fake_feeds.py --port 8097 --upload-every 3600
+
+then import with FEED_BASE_URL=http://localhost:8097 and any FEED_CHANNELS, e.g.
+FEED_CHANNELS=UCaaaaaaaaaaaaaaaaaaaaaa,UCbbbbbbbbbbbbbbbbbbbbbb.  Every channel id gets a feed
+of its 15 latest uploads; each channel uploads every `--upload-every` seconds (at its own
+offset), so the feeds change over time.  Responses carry an ETag and Last-Modified and
+conditional requests for an unchanged feed get 304 Not Modified.
+"""
+import argparse
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+ENTRIES = 15
+
+_FEED = '''<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015" xmlns:media="http://search.yahoo.com/mrss/" xmlns="http://www.w3.org/2005/Atom">
+ <link rel="self" href="http://www.youtube.com/feeds/videos.xml?channel_id={channel_id}"/>
+ <id>yt:channel:{channel_id}</id>
+ <yt:channelId>{channel_id}</yt:channelId>
+ <title>{name}</title>
+ <link rel="alternate" href="https://www.youtube.com/channel/{channel_id}"/>
+ <author>
+  <name>{name}</name>
+  <uri>https://www.youtube.com/channel/{channel_id}</uri>
+ </author>
+ <published>2015-01-01T00:00:00+00:00</published>
+{entries}</feed>
+'''
+
+_ENTRY = ''' <entry>
+  <id>yt:video:{video_id}</id>
+  <yt:videoId>{video_id}</yt:videoId>
+  <yt:channelId>{channel_id}</yt:channelId>
+  <title>{title}</title>
+  <link rel="alternate" href="https://www.youtube.com/watch?v={video_id}"/>
+  <author>
+   <name>{name}</name>
+   <uri>https://www.youtube.com/channel/{channel_id}</uri>
+  </author>
+  <published>{published}</published>
+  <updated>{published}</updated>
+  <media:group>
+   <media:title>{title}</media:title>
+   <media:content url="https://www.youtube.com/v/{video_id}?version=3" type="application/x-shockwave-flash" width="640" height="390"/>
+   <media:thumbnail url="https://i4.ytimg.com/vi/{video_id}/hqdefault.jpg" width="480" height="360"/>
+   <media:description>Upload {number} of {name}.</media:description>
+   <media:community>
+    <media:starRating count="12" average="5.00" min="1" max="5"/>
+    <media:statistics views="345"/>
+   </media:community>
+  </media:group>
+ </entry>
+'''
+
+
+def video_id(channel_id, number):
+    return hashlib.sha256(f'{channel_id}:{number}'.encode()).hexdigest()[:11]
+
+
+def feed(channel_id, upload_every, now=None):
+    """The channel's feed as of `now`, and the time of its newest upload."""
+    now = now or time.time()
+    offset = int(hashlib.sha256(channel_id.encode()).hexdigest()[:8], 16) % upload_every
+    newest = int((now - offset) // upload_every)
+    name = f'Channel {channel_id[-6:]}'
+    entries = []
+    for number in range(newest, newest - ENTRIES, -1):
+        published = datetime.fromtimestamp(number * upload_every + offset, timezone.utc)
+        entries.append(_ENTRY.format(video_id=video_id(channel_id, number), channel_id=channel_id, name=escape(name),
+                                     title=escape(f'{name} upload {number} & more'), number=number,
+                                     published=published.isoformat()))
+    return (_FEED.format(channel_id=channel_id, name=escape(name), entries=''.join(entries)),
+            datetime.fromtimestamp(newest * upload_every + offset, timezone.utc))
+
+
+class FakeFeedHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    upload_every = 3600
+    stats = {'requests': 0, 'not_modified': 0}
+    stats_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        channel_id = parse_qs(url.query).get('channel_id', [None])[0]
+        if url.path != '/feeds/videos.xml' or not channel_id:
+            self.send_error(404)
+            return
+        body, updated = feed(channel_id, self.upload_every)
+        etag = '"' + hashlib.sha256(body.encode()).hexdigest()[:16] + '"'
+        last_modified = format_datetime(updated, usegmt=True)
+        time.sleep(self.latency)
+
+        not_modified = (self.headers.get('If-None-Match') == etag
+                        or (not self.headers.get('If-None-Match') and self.headers.get('If-Modified-Since') == last_modified))
+        with self.stats_lock:
+            self.stats['requests'] += 1
+            self.stats['not_modified'] += not_modified
+        if not_modified:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        data = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/xml; charset=UTF-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', last_modified)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def serve(port=8097, latency=0.0, upload_every=3600):
+    """Start the server on a background thread and return it; call shutdown() when done."""
+    FakeFeedHandler.latency = latency
+    FakeFeedHandler.upload_every = upload_every
+    server = ThreadingHTTPServer(('127.0.0.1', port), FakeFeedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8097)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds to wait before answering')
+    parser.add_argument('--upload-every', type=int, default=3600, help='seconds between uploads of each channel')
+    args = parser.parse_args()
+
+    server = serve(args.port, args.latency, args.upload_every)
+    print(f'fake channel feeds at http://127.0.0.1:{args.port}/feeds/videos.xml?channel_id=...')
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,64 @@
+"""A local stand-in for YouTube's thumbnail host, for exercising the thumbnail store offline.
+
+    python bench/fake_images.py --port 8098 --latency 0.05
+
+then run the app or `python -m youtuber thumbnails` with THUMBNAIL_SOURCE_URL=http://localhost:8098.
+Every path (e.g. /vi/<video id>/hqdefault.jpg) gets a 480x360 JPEG that depends only on the
+path, with letterbox bars like a real hqdefault.jpg; the 50 distinct images are kept in memory.
+"""
+import argparse
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from synthetic import thumbnail_jpeg
+
+
+class FakeImageHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    stats = {'requests': 0, 'bytes': 0}
+    stats_lock = threading.Lock()
+    images = {}
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        # a handful of distinct pictures is enough, and keeps the server from burning CPU on encoding
+        seed = zlib.crc32(self.path.split('?')[0].encode()) % 50
+        image = self.images.get(seed)
+        if image is None:
+            image = self.images[seed] = thumbnail_jpeg(seed)
+        time.sleep(self.latency)
+        with self.stats_lock:
+            self.stats['requests'] += 1
+            self.stats['bytes'] += len(image)
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/jpeg')
+        self.send_header('Content-Length', str(len(image)))
+        self.end_headers()
+        self.wfile.write(image)
+
+
+def serve(port=8098, latency=0.0):
+    """Start the server on a background thread and return it; call shutdown() when done."""
+    FakeImageHandler.latency = latency
+    server = ThreadingHTTPServer(('127.0.0.1', port), FakeImageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8098)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds to wait before answering')
+    args = parser.parse_args()
+
+    server = serve(args.port, args.latency)
+    print(f'fake image host listening on http://127.0.0.1:{args.port}')
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,176 @@
+"""A tiny OpenAI-compatible chat completions server for exercising the LLM code offline.
+
+    python bench/fake_openai.py --port 8099 --latency 0.5 --token-latency 0.02 --rate-limit 0.2 --retry-after 2
+
+then run the app with OPENAI_BASE_URL=http://localhost:8099/v1 and any OPENAI_API_KEY.
+Requests that offer tools get a tool call choosing the first enum value of the first
+string parameter, structured-output requests (`response_format` with a JSON schema) get
+JSON matching the schema, with one array item per numbered line of the prompt, and
+everything else gets a short canned answer.  --latency is the wait before the first token
+and --token-latency the wait for each further word; `stream` requests get the answer as
+server-sent chunks, a word at a time, with the usage in a last chunk if they ask for it.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    token_latency = 0.0
+    rate_limit = 0.0
+    retry_after = 1
+    stats = {'requests': 0, 'rate_limited': 0}
+    stats_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+
+        with self.stats_lock:
+            self.stats['requests'] += 1
+            limited = random.random() < self.rate_limit
+            if limited:
+                self.stats['rate_limited'] += 1
+
+        if not self.path.endswith('/chat/completions'):
+            self.send_json(404, {'error': {'message': f'unknown path {self.path}'}})
+            return
+        if limited:
+            self.send_json(429, {'error': {'message': 'Rate limit reached', 'type': 'requests',
+                                           'code': 'rate_limit_exceeded'}},
+                           headers={'Retry-After': str(self.retry_after)})
+            return
+
+        time.sleep(self.latency)
+        response = completion(request)
+        content = response['choices'][0]['message']['content'] or ''
+        words = re.findall(r'\S+\s*', content)
+        if not request.get('stream'):
+            time.sleep(self.token_latency * max(0, len(words) - 1))
+            self.send_json(200, response)
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        for n, word in enumerate(words):
+            if n:
+                time.sleep(self.token_latency)
+            delta = {'role': 'assistant', 'content': word} if n == 0 else {'content': word}
+            self.send_event(chunk(response, [{'index': 0, 'delta': delta, 'logprobs': None, 'finish_reason': None}]))
+        self.send_event(chunk(response, [{'index': 0, 'delta': {}, 'logprobs': None,
+                                          'finish_reason': response['choices'][0]['finish_reason']}]))
+        if (request.get('stream_options') or {}).get('include_usage'):
+            self.send_event(chunk(response, [], response['usage']))
+        self.wfile.write(b'data: [DONE]\n\n')
+        self.wfile.flush()
+
+    def send_event(self, body):
+        self.wfile.write(b'data: ' + json.dumps(body).encode() + b'\n\n')
+        self.wfile.flush()
+
+
+def chunk(response, choices, usage=None):
+    """One chat.completion.chunk of a streamed response."""
+    return {'id': response['id'], 'object': 'chat.completion.chunk', 'created': response['created'],
+            'model': response['model'], 'choices': choices, 'usage': usage}
+
+
+def completion(request):
+    prompt = ''.join(str(message.get('content', '')) for message in request.get('messages', []))
+    prompt_tokens = len(prompt) // 4 + 1
+    message = {'role': 'assistant', 'content': None}
+    finish_reason = 'stop'
+
+    tools = request.get('tools') or []
+    if tools:
+        function = tools[0]['function']
+        arguments = {}
+        for name, schema in function['parameters'].get('properties', {}).items():
+            arguments[name] = (schema.get('enum') or ['Uncategorized'])[0]
+        message['tool_calls'] = [{'id': 'call_fake', 'type': 'function',
+                                  'function': {'name': function['name'], 'arguments': json.dumps(arguments)}}]
+        finish_reason = 'tool_calls'
+    elif (request.get('response_format') or {}).get('type') == 'json_schema':
+        numbered = len(re.findall(r'^\d+\. ', prompt, re.MULTILINE)) or 1
+        schema = request['response_format']['json_schema']['schema']
+        message['content'] = json.dumps(schema_value(schema, numbered))
+    else:
+        message['content'] = f'A fake answer to a {len(prompt)} character prompt.'
+
+    completion_tokens = len(message['content'] or '') // 4 + 1
+    return {
+        'id': 'chatcmpl-fake',
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': request.get('model', 'fake'),
+        'choices': [{'index': 0, 'message': message, 'logprobs': None, 'finish_reason': finish_reason}],
+        'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                  'total_tokens': prompt_tokens + completion_tokens},
+    }
+
+
+def schema_value(schema, items=1, index=1):
+    """A value matching a JSON schema: first enum values, arrays of `items` items numbered from 1."""
+    kind = schema.get('type')
+    if 'enum' in schema:
+        return schema['enum'][0]
+    if kind == 'object':
+        return {name: schema_value(prop, items, index) for name, prop in schema.get('properties', {}).items()}
+    if kind == 'array':
+        return [schema_value(schema.get('items', {}), items, n) for n in range(1, items + 1)]
+    if kind == 'integer':
+        return index
+    if kind == 'number':
+        return float(index)
+    if kind == 'boolean':
+        return True
+    return 'Uncategorized'
+
+
+def serve(port=8099, latency=0.0, rate_limit=0.0, retry_after=1, token_latency=0.0):
+    """Start the server on a background thread and return it; call shutdown() when done."""
+    FakeOpenAIHandler.latency = latency
+    FakeOpenAIHandler.token_latency = token_latency
+    FakeOpenAIHandler.rate_limit = rate_limit
+    FakeOpenAIHandler.retry_after = retry_after
+    server = ThreadingHTTPServer(('127.0.0.1', port), FakeOpenAIHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds to wait before answering')
+    parser.add_argument('--token-latency', type=float, default=0.0, help='seconds to wait for each further word')
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='fraction of requests answered with 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with 429s')
+    args = parser.parse_args()
+
+    server = serve(args.port, args.latency, args.rate_limit, args.retry_after, args.token_latency)
+    print(f'fake OpenAI listening on http://127.0.0.1:{args.port}/v1')
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
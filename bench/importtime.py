@@ -0,0 +1,101 @@
+"""Measure how long each entry point takes to import, and check it doesn't pull in heavy libraries.
+
+    python bench/importtime.py
+    python bench/importtime.py --json
+    python bench/importtime.py --top 20
+
+Each entry point is imported in a fresh interpreter with `python -X importtime`, which
+reports the cumulative import time of every module.  Dummy values are used for the
+required settings so no .env is needed.  Exits non-zero when an entry point is over its
+budget or imports a module it shouldn't, so it can guard against regressions.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY = ('selenium', 'undetected_chromedriver', 'bs4', 'dateparser', 'pytubefix', 'openai', 'tiktoken')
+
+# (name, module imported, budget in ms, modules it must not import)
+ENTRY_POINTS = [
+    ('homepage', 'views', 1500, HEAVY),
+    ('cli', 'cli', 300, HEAVY + ('streamlit',)),
+]
+
+DUMMY_ENV = {
+    'MODEL': 'gpt-4o-mini', 'MAX_TOKENS': '1000', 'OPENAI_API_KEY': 'x', 'YOUTUBE_USERNAME': 'x',
+    'YOUTUBE_PASSWORD': 'x', 'ALLOW_ANY_CATEGORY': 'false', 'CATEGORIES': 'News,Music',
+    'POSTGRES_DB': 'x', 'POSTGRES_USER': 'x', 'POSTGRES_PASSWORD': 'x', 'POSTGRES_HOST': 'localhost',
+}
+
+
+def import_times(module):
+    """Total µs for a fresh import of `module`, {direct import: cumulative µs} and every package it imported."""
+    env = {**os.environ, **DUMMY_ENV}
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f'importing {module} failed:\n{result.stderr[-2000:]}')
+
+    packages = {}
+    modules = set()
+    total = 0
+    pending = []
+    for line in result.stderr.splitlines():
+        # "import time:   self [us] | cumulative | imported package", children before their parent
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        name = name.strip()
+        if depth > 0:
+            pending.append((depth, name, int(cumulative)))
+            continue
+        if name == module:
+            total = int(cumulative)
+            for depth, child, us in pending:
+                modules.add(child.split('.')[0])
+                if depth == 1:
+                    # a direct import: its cumulative time includes everything it imported
+                    packages[child] = packages.get(child, 0) + us
+        pending = []
+    return total, packages, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--top', type=int, default=10, help='show the slowest N direct imports')
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    args = parser.parse_args()
+
+    results = []
+    failed = False
+    for name, module, budget_ms, forbidden in ENTRY_POINTS:
+        total, packages, modules = import_times(module)
+        bad = sorted(modules & set(forbidden))
+        ms = total / 1000
+        ok = ms <= budget_ms and not bad
+        failed |= not ok
+        slowest = sorted(packages.items(), key=lambda item: -item[1])[:args.top]
+        results.append({'entry_point': name, 'module': module, 'ms': round(ms, 1), 'budget_ms': budget_ms,
+                        'forbidden_imported': bad, 'ok': ok,
+                        'slowest': [{'module': package, 'ms': round(us / 1000, 1)} for package, us in slowest]})
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            print(f"{result['entry_point']} (import {result['module']}): {result['ms']:.0f} ms, "
+                  f"budget {result['budget_ms']} ms - {'ok' if result['ok'] else 'FAIL'}")
+            if result['forbidden_imported']:
+                print(f"  imports {', '.join(result['forbidden_imported'])}")
+            for slow in result['slowest']:
+                print(f"  {slow['ms']:8.1f} ms  {slow['module']}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""Synthetic YouTube data for the benchmarks: home page feeds, caption payloads, videos and thumbnails."""
+import random
+from datetime import datetime, timedelta
+
+_WORDS = ('python linux quantum robot solar music history space neural arduino climate economics philosophy '
+          'rust kernel telescope battery printer comedy review tutorial news build guide').split()
+
+_ITEM = '''<ytd-rich-item-renderer class="style-scope ytd-rich-grid-renderer">
+<div id="content"><yt-lockup-view-model class="ytd-rich-item-renderer lockup">
+<div class="yt-lockup-view-model yt-lockup-view-model--vertical">
+<a href="/watch?v={video_id}&amp;pp=0gcJCdgAo7VqN5tD" class="yt-lockup-view-model__content-image" tabindex="-1">
+<yt-thumbnail-view-model class="ytThumbnailViewModelHost"><div class="ytThumbnailViewModelImage">{thumbnail}</div>
+<yt-thumbnail-overlay-badge-view-model><yt-thumbnail-badge-view-model class="yt-thumbnail-badge-view-model-wiz">
+<badge-shape class="yt-badge-shape"><div class="yt-badge-shape__text">{length}</div></badge-shape>
+</yt-thumbnail-badge-view-model></yt-thumbnail-overlay-badge-view-model>{progress}
+</yt-thumbnail-view-model></a>
+<div class="yt-lockup-view-model__metadata"><yt-lockup-metadata-view-model class="yt-lockup-metadata-view-model">
+<div class="yt-lockup-metadata-view-model__text-container">
+<h3 class="yt-lockup-metadata-view-model__heading-reset" title="{title}">
+<a href="/watch?v={video_id}" class="yt-lockup-metadata-view-model__title"><span class="yt-core-attributed-string">{title}</span></a></h3>
+<div class="yt-lockup-metadata-view-model__metadata"><yt-content-metadata-view-model class="yt-content-metadata-view-model">
+<div class="yt-content-metadata-view-model__metadata-row"><span class="yt-content-metadata-view-model__metadata-text">
+<a href="/@{channel_handle}" class="yt-core-attributed-string__link">{channel}</a></span></div>
+<div class="yt-content-metadata-view-model__metadata-row">
+<span class="yt-content-metadata-view-model__metadata-text">{views} views</span>
+<span class="yt-content-metadata-view-model__delimiter"> • </span>
+<span class="yt-content-metadata-view-model__metadata-text">{age} ago</span></div>
+</yt-content-metadata-view-model></div></div>
+<button-view-model class="yt-spec-button-view-model"><button aria-label="More actions"><div class="yt-spec-touch-feedback-shape">
+<div class="yt-spec-touch-feedback-shape__stroke"></div><div class="yt-spec-touch-feedback-shape__fill"></div></div></button></button-view-model>
+</yt-lockup-metadata-view-model></div></div></yt-lockup-view-model></div>
+</ytd-rich-item-renderer>
+'''
+
+_AD = '''<ytd-rich-item-renderer class="style-scope ytd-rich-grid-renderer"><div id="content">
+<ytd-ad-slot-renderer><span>Sponsored</span><a href="https://example.com/ad">Buy things</a></ytd-ad-slot-renderer>
+</div></ytd-rich-item-renderer>
+'''
+
+
+def video_id(rng):
+    alphabet = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_'
+    return ''.join(rng.choice(alphabet) for _ in range(11))
+
+
+def home_page_html(count, seed=0, ad_every=25, padding=2000):
+    """A page shaped like the scrolled YouTube home feed with `count` video items.
+
+    Every `ad_every`th item is an ad, some thumbnails are missing as if not lazy-loaded
+    yet, some videos are partially watched, and each item carries `padding` bytes of
+    inert markup to approximate the size of the real page.
+    """
+    rng = random.Random(seed)
+    filler = '<div class="ytd-filler" hidden>' + 'x' * padding + '</div>'
+    parts = ['<!DOCTYPE html><html><head><title>YouTube</title></head><body><ytd-app><div id="contents">']
+    for n in range(count):
+        if ad_every and n % ad_every == ad_every - 1:
+            parts.append(_AD)
+        vid = video_id(rng)
+        title = ' '.join(rng.choice(_WORDS) for _ in range(rng.randint(4, 10))).title()
+        channel = ' '.join(rng.choice(_WORDS) for _ in range(2)).title()
+        thumbnail = (f'<img class="ytCoreImageHost" src="https://i.ytimg.com/vi/{vid}/hqdefault.jpg?sqp=x">'
+                     if rng.random() < 0.7 else '<img class="ytCoreImageHost">')
+        progress = ''
+        if rng.random() < 0.2:
+            progress = ('<div class="ytThumbnailOverlayProgressBarHostWatchedProgressBarSegment" '
+                        f'style="width: {rng.randint(1, 100)}%;"></div>')
+        parts.append(_ITEM.format(
+            video_id=vid, title=title, channel=channel, channel_handle=channel.replace(' ', ''),
+            thumbnail=thumbnail, progress=progress,
+            length=f'{rng.randint(0, 59)}:{rng.randint(0, 59):02d}' if rng.random() < 0.95 else 'LIVE',
+            views=f'{rng.randint(1, 999)}K',
+            age=f"{rng.randint(1, 11)} {rng.choice(['hours', 'days', 'weeks', 'months'])}",
+        ))
+        parts.append(filler)
+    parts.append('</div></ytd-app></body></html>')
+    return ''.join(parts)
+
+
+def json_captions(seconds, seed=0, words_per_segment=3):
+    """A pytubefix-style `json_captions` payload covering `seconds` of speech."""
+    rng = random.Random(seed)
+    events = []
+    t = 0
+    while t < seconds * 1000:
+        segs = [{'utf8': rng.choice(_WORDS)}]
+        segs += [{'utf8': ' ' + rng.choice(_WORDS), 'tOffsetMs': 200 * i} for i in range(1, words_per_segment)]
+        events.append({'tStartMs': t, 'dDurationMs': 2000, 'wWinId': 1, 'segs': segs})
+        events.append({'tStartMs': t + 1900, 'dDurationMs': 100, 'wWinId': 1, 'aAppend': 1, 'segs': [{'utf8': '\n'}]})
+        t += 2000
+    return {'wireMagic': 'pb3', 'pens': [{}], 'wsWinStyles': [{}], 'wpWinPositions': [{}], 'events': events}
+
+
+def videos(count, seed=0, categories=('News', 'Music'), transcript_words=600):
+    """Video dicts as the import pipeline hands them to store.insert_videos, with links unique per seed."""
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        title = ' '.join(rng.choice(_WORDS) for _ in range(rng.randint(4, 10))).title()
+        transcript = ' '.join(rng.choice(_WORDS) for _ in range(transcript_words))
+        vid = video_id(rng)
+        rows.append({
+            'title': title,
+            'link': f'https://www.youtube.com/watch?v={vid}',
+            'channel': ' '.join(rng.choice(_WORDS) for _ in range(2)).title(),
+            'thumbnail': f'https://i.ytimg.com/vi/{vid}/hqdefault.jpg',
+            'thumbnail_file': None,
+            'progress': rng.choice([0, 0, 0, rng.randint(1, 100)]),
+            'created': datetime(2025, 1, 1) + timedelta(minutes=rng.randint(0, 500000)),
+            'video_length': f'{rng.randint(0, 59)}:{rng.randint(0, 59):02d}',
+            'subtitles': transcript,
+            'captions': None,
+            'summary': transcript[:400],
+            'blurb': title,
+            'themes': ', '.join(rng.sample(_WORDS, 3)),
+            'category': rng.choice(list(categories)),
+        })
+    return rows
+
+
+def thumbnail_jpeg(seed=0, size=(480, 360), quality=80):
+    """An hqdefault-sized JPEG: a 16:9 picture of gradients and noise between black bars, like YouTube's."""
+    import io
+
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(seed)
+    width, height = size
+    bar = (height - width * 9 // 16) // 2
+    image = Image.new('RGB', size)
+    picture = Image.effect_noise((width, height - 2 * bar), rng.randint(20, 60)).convert('RGB')
+    tint = Image.linear_gradient('L').resize(picture.size).convert('RGB')
+    picture = Image.blend(picture, tint, 0.5)
+    draw = ImageDraw.Draw(picture)
+    for _ in range(6):
+        x, y = rng.randrange(width), rng.randrange(height - 2 * bar)
+        draw.ellipse((x, y, x + rng.randint(20, 120), y + rng.randint(20, 120)),
+                     fill=tuple(rng.randrange(256) for _ in range(3)))
+    image.paste(picture, (0, bar))
+    out = io.BytesIO()
+    image.save(out, 'JPEG', quality=quality)
+    return out.getvalue()
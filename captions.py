@@ -0,0 +1,175 @@
+"""Fetching, storing and flattening YouTube captions.
+
+The raw timed captions (pytubefix's `json_captions`) are kept zlib-compressed in the
+`captions` column, so the transcript text can be derived again, e.g. with timestamps,
+without going back to YouTube.
+"""
+import json
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from urllib.parse import parse_qs, urlparse
+
+import metrics
+
+# the auto-generated English track
+CAPTION_LANGUAGE = 'a.en'
+
+
+@metrics.timed('captions_to_text_seconds')
+def captions_to_text(captions, timestamps=False):
+    """Flatten `json_captions` into the transcript text, in time linear in its size.
+
+    With `timestamps` every caption event starts a new line prefixed with its start time,
+    e.g. "[1:02:03] some words", which is handy for quoting but costs tokens.
+    """
+    if captions is None:
+        return None
+    if not timestamps:
+        return ''.join(seg['utf8'] for event in captions['events'] for seg in event.get('segs', ())).replace('\n', ' ')
+
+    lines = []
+    for event in captions['events']:
+        text = ''.join(seg['utf8'] for seg in event.get('segs', ())).replace('\n', ' ').strip()
+        if text:
+            lines.append(f"[{format_timestamp(event.get('tStartMs', 0))}] {text}")
+    return '\n'.join(lines)
+
+
+def format_timestamp(ms):
+    seconds = int(ms) // 1000
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    return f'{hours}:{minutes:02d}:{seconds:02d}' if hours else f'{minutes}:{seconds:02d}'
+
+
+def compress_captions(captions):
+    """`json_captions` as compact zlib-compressed JSON for the BYTEA `captions` column."""
+    if captions is None:
+        return None
+    return zlib.compress(json.dumps(captions, separators=(',', ':')).encode('utf-8'), 6)
+
+
+def decompress_captions(data):
+    if data is None:
+        return None
+    return json.loads(zlib.decompress(bytes(data)).decode('utf-8'))
+
+
+def video_id_from_link(link):
+    return parse_qs(urlparse(link).query).get('v', [link.rsplit('/', 1)[-1]])[0]
+
+
+class YouTubeCaptionSource:
+    """Fetches `json_captions` from YouTube with pytubefix; None when the video has no such track."""
+
+    def __init__(self, language=CAPTION_LANGUAGE):
+        self.language = language
+
+    def fetch(self, link):
+        from pytubefix import YouTube
+
+        yt = YouTube(link)
+        yt.bypass_age_gate()
+        caption = yt.captions.get(self.language, None)
+        return caption.json_captions if caption else None
+
+
+class FixtureCaptionSource:
+    """Serves captions recorded as `<video id>.json` files, for working without the network.
+
+    A video without a file has no captions.  `latency` seconds are slept per fetch to
+    stand in for the network when measuring concurrency.
+    """
+
+    def __init__(self, directory, latency=0.0):
+        self.directory = directory
+        self.latency = latency
+
+    def fetch(self, link):
+        if self.latency:
+            time.sleep(self.latency)
+        path = os.path.join(self.directory, video_id_from_link(link) + '.json')
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+
+def record_fixture(directory, link, captions):
+    """Save captions where FixtureCaptionSource will find them."""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, video_id_from_link(link) + '.json'), 'w', encoding='utf-8') as f:
+        json.dump(captions, f)
+
+
+class HostLimiter:
+    """Politeness per host: at most `concurrency` requests in flight and `interval` seconds between starts."""
+
+    def __init__(self, concurrency=2, interval=0.5):
+        self.concurrency = max(1, int(concurrency))
+        self.interval = interval
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+    def _host(self, host):
+        with self.lock:
+            if host not in self.hosts:
+                self.hosts[host] = {'slots': threading.Semaphore(self.concurrency), 'next_start': 0.0}
+            return self.hosts[host]
+
+    @contextmanager
+    def slot(self, host):
+        state = self._host(host)
+        with state['slots']:
+            with self.lock:
+                now = time.monotonic()
+                start = max(now, state['next_start'])
+                state['next_start'] = start + self.interval
+            if start > now:
+                time.sleep(start - now)
+            yield
+
+    def pause(self, host, seconds):
+        """Hold back new requests to `host`, e.g. after it answered 429 Too Many Requests."""
+        state = self._host(host)
+        with self.lock:
+            state['next_start'] = max(state['next_start'], time.monotonic() + seconds)
+
+
+class CaptionFetcher:
+    """Fetches captions from `source` for many videos at once, politely.
+
+    `fetch` can be called from any number of threads (import pipeline, job workers);
+    `fetch_many` runs its own pool of `workers` threads.  Either way the shared
+    HostLimiter keeps the load on each host bounded.
+    """
+
+    def __init__(self, source, workers=8, host_concurrency=2, host_interval=0.5, rate_limit_pause=30.0):
+        self.source = source
+        self.workers = max(1, int(workers))
+        self.limiter = HostLimiter(host_concurrency, host_interval)
+        self.rate_limit_pause = rate_limit_pause
+
+    def fetch(self, link):
+        host = urlparse(link).netloc
+        with self.limiter.slot(host), metrics.timer('caption_fetch_seconds', host=host):
+            try:
+                return self.source.fetch(link)
+            except Exception as e:
+                if getattr(e, 'code', None) == 429 or getattr(e, 'status', None) == 429:
+                    self.limiter.pause(host, self.rate_limit_pause)
+                raise
+
+    def fetch_many(self, links):
+        """Yield (link, captions or None, error or None) as each fetch finishes."""
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='captions') as pool:
+            futures = {pool.submit(self.fetch, link): link for link in links}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, e
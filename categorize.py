@@ -0,0 +1,220 @@
+"""Choosing a category for videos: the local classifier first, then batched LLM requests."""
+import json
+import re
+import time
+
+import config
+import metrics
+import store
+from classifier import CategoryClassifier, evaluate, split_holdout
+from llm import cache_key, estimate_tokens
+from resources import category_registry, classifier, llm_cache, llm_executor, openai_client
+
+
+def categorize_videos(videos):
+    """Categorize video dicts (title, summary, themes) and return one category per video.
+
+    The local classifier answers the videos it is confident about, and the rest are sent
+    to the LLM together in batches of CATEGORIZE_BATCH_SIZE.
+    """
+    results = [None] * len(videos)
+    remaining = []
+    local = classifier()
+    for i, video in enumerate(videos):
+        if local is not None:
+            category, score, confident = local.predict(f"{video['title']} {video['summary'] or ''}")
+            # the model may predate a rename, so only trust categories the registry still knows
+            if confident and category_registry().lookup(category):
+                print(f'=={category}== (local {score:.2f})')
+                results[i] = category_registry().lookup(category)
+                metrics.inc('videos_categorized_total', by='classifier')
+                continue
+        remaining.append(i)
+
+    for start in range(0, len(remaining), config.CATEGORIZE_BATCH_SIZE):
+        batch = remaining[start:start + config.CATEGORIZE_BATCH_SIZE]
+        for i, category in zip(batch, get_categories([videos[i] for i in batch])):
+            results[i] = category
+        metrics.inc('videos_categorized_total', len(batch), by='llm')
+    return results
+
+
+CATEGORIZE_SYSTEM_PROMPT = ("You are an expert video categorizer. You are given a numbered list of videos with their title "
+                            "and summary and you need to select the best category for each video. Return exactly one "
+                            "category for every video number.")
+
+
+def describe_video(video, rejected=()):
+    description = f"TITLE: {video['title']}"
+    if video.get('summary'):
+        description += f"\n SUMMARY: {video['summary'][:1000]}"
+    if video.get('themes'):
+        description += f"\n THEMES: {video['themes'][:500]}"
+    if rejected:
+        description += f"\n PREVIOUS BAD CATEGORIES: {','.join(rejected)}"
+    return description
+
+
+def categories_schema(categories):
+    category = {"type": "string", "description": "The category to categorize the video into"}
+    if not config.ALLOW_ANY_CATEGORY:
+        category["enum"] = categories
+    return {
+        "type": "object",
+        "properties": {
+            "categories": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "video": {"type": "integer", "description": "The number of the video in the list"},
+                        "category": category,
+                    },
+                    "required": ["video", "category"],
+                    "additionalProperties": False,
+                },
+            },
+        },
+        "required": ["categories"],
+        "additionalProperties": False,
+    }
+
+
+def clean_category(category):
+    category = (category or '').strip().replace('Category: ', '')
+    # Extract text between ** if present
+    if '**' in category:
+        match = re.search(r'\*\*([^\*]+)\*\*', category)
+        if match:
+            category = match.group(1)
+    return category.replace('*', '').replace('\n', '').strip()
+
+
+def request_categories(videos, categories, rejected):
+    """One structured-output request categorizing every video; returns {position: raw answer}."""
+    if config.ALLOW_ANY_CATEGORY:
+        instructions = 'Example categories:\n' + '\n'.join(categories) + '\nPrefer one of these; otherwise use a one or two word category name.'
+    else:
+        instructions = 'Choose only from the allowed categories.'
+    user_prompt = instructions + '\n-------\n' + '\n\n'.join(
+        f'{n}. {describe_video(video, rejected[n - 1])}' for n, video in enumerate(videos, 1))
+
+    response = llm_executor().call(
+        openai_client().chat.completions.create,
+        estimate_tokens(user_prompt) + 30 * len(videos),
+        model=config.MODEL,
+        messages=[
+            {"role": "system", "content": CATEGORIZE_SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt},
+        ],
+        response_format={"type": "json_schema",
+                         "json_schema": {"name": "categorize", "strict": True, "schema": categories_schema(categories)}},
+    )
+    answers = {}
+    try:
+        for answer in json.loads(response.choices[0].message.content)['categories']:
+            answers[answer['video'] - 1] = answer['category']
+    except (TypeError, ValueError, KeyError) as e:
+        print(f'unreadable categorization response: {e}')
+    return answers
+
+
+@metrics.timed('get_categories_seconds')
+def get_categories(videos, use_cache=True, retries=2):
+    """Categorize several video dicts (title, summary, themes) with as few LLM requests as possible.
+
+    All uncached videos go into a single request whose answers must match the category
+    registry.  Videos with a missing or invalid answer are split into halves and retried,
+    up to `retries` more times; those still without a valid answer get Uncategorized.
+    Returns one category per video.
+    """
+    categories = category_registry().names()
+    results = [None] * len(videos)
+    keys = [cache_key(config.MODEL, CATEGORIZE_SYSTEM_PROMPT, describe_video(video), categories, config.ALLOW_ANY_CATEGORY)
+            for video in videos]
+    pending = []
+    for i, key in enumerate(keys):
+        cached = llm_cache().get(key, bypass=not use_cache)
+        if cached is not None:
+            results[i] = cached
+        else:
+            pending.append(i)
+
+    rejected = {i: [] for i in pending}
+    batches = [(pending, retries)] if pending else []
+    while batches:
+        indices, retries_left = batches.pop()
+        answers = request_categories([videos[i] for i in indices], categories, [rejected[i] for i in indices])
+        invalid = []
+        for position, i in enumerate(indices):
+            answer = clean_category(answers.get(position))
+            category = category_registry().lookup(answer)
+            if category and '"' not in category:
+                results[i] = category
+                llm_cache().put(keys[i], category)
+                continue
+            print(f'INVALID CATEGORY "{answer}" for {videos[i]["title"]}')
+            if answer and len(answer.split()) <= 3:
+                rejected[i].append(answer)
+            invalid.append(i)
+
+        if not invalid:
+            continue
+        if retries_left > 0:
+            middle = (len(invalid) + 1) // 2
+            batches.append((invalid[:middle], retries_left - 1))
+            if invalid[middle:]:
+                batches.append((invalid[middle:], retries_left - 1))
+        else:
+            # out of retries: like before, every video still gets a category; a new short name
+            # when any category is allowed, otherwise Uncategorized
+            for i in invalid:
+                answer = rejected[i][-1] if rejected[i] and config.ALLOW_ANY_CATEGORY else ''
+                results[i] = answer if answer and '"' not in answer else 'Uncategorized'
+
+    for video, category in zip(videos, results):
+        print(f'=={category}== {video["title"]}')
+    return results
+
+
+@metrics.timed('get_category_seconds')
+def get_category(title, summary, themes, use_cache=True):
+    return get_categories([{'title': title, 'summary': summary, 'themes': themes}], use_cache)[0]
+
+
+def train_classifier(holdout_fraction=0.2):
+    """Evaluate a classifier on a holdout of the categorized videos, then train and save one on all of them.
+
+    Returns the evaluation report and the holdout videos.
+    """
+    videos = store.load_categorized_videos()
+    examples = [(video['id'], f"{video['title']} {video['summary'] or ''}", video['category']) for video in videos]
+    train, holdout = split_holdout(examples, holdout_fraction)
+
+    started = time.perf_counter()
+    trial = CategoryClassifier(min_score=config.CLASSIFIER_MIN_SCORE, min_margin=config.CLASSIFIER_MIN_MARGIN)
+    trial.train([(text, category) for _, text, category in train])
+    report = evaluate(trial, holdout)
+    report['train_seconds'] = time.perf_counter() - started
+
+    final = CategoryClassifier(min_score=config.CLASSIFIER_MIN_SCORE, min_margin=config.CLASSIFIER_MIN_MARGIN)
+    final.train([(text, category) for _, text, category in examples])
+    final.save(config.CLASSIFIER_PATH)
+    classifier.clear()
+
+    holdout_ids = {key for key, _, _ in holdout}
+    return report, [video for video in videos if video['id'] in holdout_ids]
+
+
+def compare_with_llm(videos):
+    """Accuracy and latency of the LLM categorizer on the given already-categorized videos."""
+    report = {'examples': len(videos), 'correct': 0, 'seconds': 0.0}
+    for video in videos:
+        started = time.perf_counter()
+        category = get_category(video['title'], video['summary'], None, use_cache=False)
+        report['seconds'] += time.perf_counter() - started
+        report['correct'] += bool(category) and category.lower() == video['category'].lower()
+    examples = report['examples'] or 1
+    report['accuracy'] = report['correct'] / examples
+    report['ms_per_video'] = report['seconds'] * 1000 / examples
+    return report
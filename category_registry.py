@@ -0,0 +1,70 @@
+import threading
+
+
+class CategoryRegistry:
+    """The rows of the categories table, held in memory.
+
+    Loaded once and then kept up to date as categories are created and renamed, so
+    classifying a video or resolving a category name never needs a query.  Lookups are
+    case-insensitive and return the canonical spelling.  Video counts are not kept here:
+    the table maintains them itself (see migrations/0006_categories.sql).  All methods
+    are safe to call from several threads.
+    """
+
+    UNCATEGORIZED = 'Uncategorized'
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ids_by_key = {}
+        self.names_by_id = {}
+
+    def seed(self, cur, names):
+        """Make sure the categories in `names` exist in the table, using the given cursor."""
+        for name in names:
+            cur.execute('INSERT INTO categories (name) VALUES (%s) ON CONFLICT DO NOTHING', (name.strip(),))
+
+    def load(self, cur):
+        """(Re)load the categories from the database using the given cursor."""
+        cur.execute('SELECT id, name FROM categories')
+        rows = cur.fetchall()
+        with self.lock:
+            self.ids_by_key = {name.lower(): category_id for category_id, name in rows}
+            self.names_by_id = dict(rows)
+
+    def add(self, category_id, name):
+        """Record a category row that was just created or found in the table."""
+        with self.lock:
+            self.ids_by_key[name.lower()] = category_id
+            self.names_by_id[category_id] = name
+
+    def id_of(self, name):
+        """The id of category `name`, or None if it isn't a known category."""
+        if not name:
+            return None
+        return self.ids_by_key.get(name.strip().lower())
+
+    def lookup(self, name):
+        """Return the canonical spelling of `name`, or None if it isn't a known category."""
+        category_id = self.id_of(name)
+        return None if category_id is None else self.names_by_id.get(category_id)
+
+    def rename(self, category_id, new):
+        """Record category `category_id` being renamed to `new`."""
+        with self.lock:
+            old = self.names_by_id.get(category_id)
+            if old is not None:
+                self.ids_by_key.pop(old.lower(), None)
+            self.ids_by_key[new.lower()] = category_id
+            self.names_by_id[category_id] = new
+
+    def remove(self, category_id):
+        """Record category `category_id` being deleted, e.g. after it was merged into another."""
+        with self.lock:
+            name = self.names_by_id.pop(category_id, None)
+            if name is not None and self.ids_by_key.get(name.lower()) == category_id:
+                del self.ids_by_key[name.lower()]
+
+    def names(self):
+        """All categories offered to the classifiers, without Uncategorized, sorted."""
+        with self.lock:
+            return sorted(name for name in self.names_by_id.values() if name.lower() != self.UNCATEGORIZED.lower())
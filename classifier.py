@@ -0,0 +1,145 @@
+import re
+import time
+import zlib
+
+import numpy as np
+
+_WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+def features(text):
+    """Lower-cased words and word bigrams of `text`."""
+    words = _WORD.findall(text.lower())
+    return words + [f'{a} {b}' for a, b in zip(words, words[1:])]
+
+
+class CategoryClassifier:
+    """Nearest-centroid classifier over hashed n-gram TF-IDF vectors.
+
+    Each video's title and summary are turned into word and bigram features, hashed into
+    `dims` buckets and weighted by TF-IDF.  A category is the normalized mean of its
+    videos' vectors, and a new video gets the category whose centroid has the highest
+    cosine similarity.  A prediction only counts as confident when that similarity is at
+    least `min_score` and beats the runner-up by `min_margin`.
+    """
+
+    def __init__(self, dims=2 ** 16, min_score=0.35, min_margin=0.1):
+        self.dims = dims
+        self.min_score = min_score
+        self.min_margin = min_margin
+        self.categories = []
+        self.idf = None
+        self.centroids = None
+        self.trained_at = None
+        self.trained_on = 0
+
+    def _counts(self, text):
+        indices = np.fromiter((zlib.crc32(f.encode()) % self.dims for f in features(text)), dtype=np.int64)
+        return np.unique(indices, return_counts=True)
+
+    def _vector(self, text):
+        """Sparse (indices, values) TF-IDF vector with unit length, or None for empty text."""
+        indices, counts = self._counts(text)
+        if not len(indices):
+            return None
+        values = (1 + np.log(counts)) * self.idf[indices]
+        norm = np.linalg.norm(values)
+        if not norm:
+            return None
+        return indices, (values / norm).astype(np.float32)
+
+    def train(self, examples, min_examples=3):
+        """Fit on (text, category) pairs; categories with fewer than `min_examples` videos are left out."""
+        totals = {}
+        for _, category in examples:
+            totals[category] = totals.get(category, 0) + 1
+        examples = [(text, category) for text, category in examples if totals[category] >= min_examples]
+        self.categories = sorted({category for _, category in examples})
+        rows = {category: i for i, category in enumerate(self.categories)}
+
+        document_frequency = np.zeros(self.dims, dtype=np.float64)
+        for text, _ in examples:
+            indices, _ = self._counts(text)
+            document_frequency[indices] += 1
+        self.idf = (np.log((1 + len(examples)) / (1 + document_frequency)) + 1).astype(np.float32)
+
+        self.centroids = np.zeros((len(self.categories), self.dims), dtype=np.float32)
+        for text, category in examples:
+            vector = self._vector(text)
+            if vector is not None:
+                self.centroids[rows[category], vector[0]] += vector[1]
+        norms = np.linalg.norm(self.centroids, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        self.centroids /= norms
+
+        self.trained_at = time.time()
+        self.trained_on = len(examples)
+        return self
+
+    def scores(self, text):
+        """Cosine similarity of `text` to every category centroid."""
+        vector = self._vector(text) if self.centroids is not None and len(self.categories) else None
+        if vector is None:
+            return np.zeros(len(self.categories), dtype=np.float32)
+        indices, values = vector
+        return self.centroids[:, indices] @ values
+
+    def predict(self, text):
+        """Return (category, score, confident) for `text`; category is None if nothing matches."""
+        scores = self.scores(text)
+        if not len(scores) or not scores.max():
+            return None, 0.0, False
+        order = np.argsort(scores)[::-1]
+        best = float(scores[order[0]])
+        runner_up = float(scores[order[1]]) if len(order) > 1 else 0.0
+        confident = best >= self.min_score and best - runner_up >= self.min_margin
+        return self.categories[order[0]], best, confident
+
+    def save(self, path):
+        np.savez_compressed(path, categories=np.array(self.categories, dtype=str), idf=self.idf,
+                            centroids=self.centroids, dims=self.dims, trained_at=self.trained_at,
+                            trained_on=self.trained_on)
+
+    @classmethod
+    def load(cls, path, min_score=0.35, min_margin=0.1):
+        # category names are a plain string array, so nothing pickled is ever loaded
+        data = np.load(path)
+        classifier = cls(int(data['dims']), min_score, min_margin)
+        classifier.categories = data['categories'].tolist()
+        classifier.idf = data['idf']
+        classifier.centroids = data['centroids']
+        classifier.trained_at = float(data['trained_at'])
+        classifier.trained_on = int(data['trained_on'])
+        return classifier
+
+
+def split_holdout(examples, fraction=0.2):
+    """Deterministically split (key, text, category) examples into training and holdout sets."""
+    train, holdout = [], []
+    for key, text, category in examples:
+        if zlib.crc32(str(key).encode()) % 1000 < fraction * 1000:
+            holdout.append((key, text, category))
+        else:
+            train.append((key, text, category))
+    return train, holdout
+
+
+def evaluate(classifier, holdout):
+    """Accuracy, coverage and latency of `classifier` on held-out (key, text, category) examples."""
+    report = {'examples': len(holdout), 'correct': 0, 'confident': 0, 'confident_correct': 0, 'seconds': 0.0}
+    for _, text, category in holdout:
+        started = time.perf_counter()
+        predicted, _, confident = classifier.predict(text)
+        report['seconds'] += time.perf_counter() - started
+        correct = predicted is not None and predicted.lower() == category.lower()
+        report['correct'] += correct
+        if confident:
+            report['confident'] += 1
+            report['confident_correct'] += correct
+
+    examples = report['examples'] or 1
+    report['accuracy'] = report['correct'] / examples
+    report['coverage'] = report['confident'] / examples
+    report['confident_accuracy'] = report['confident_correct'] / (report['confident'] or 1)
+    report['ms_per_video'] = report['seconds'] * 1000 / examples
+    return report
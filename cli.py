@@ -0,0 +1,206 @@
+"""Command line entry points that don't need Streamlit: `python -m youtuber <command>` or `python cli.py <command>`."""
+import argparse
+import sys
+from datetime import datetime
+
+import config
+import store
+from resources import caption_fetcher, job_queue
+from tasks import BATCH_SIZES, JOB_KINDS, save_captions
+
+
+def worker_command(args):
+    from jobs import run_workers
+
+    if args.metrics_port:
+        import metrics
+
+        metrics.serve(args.metrics_port)
+    kinds = args.kinds.split(',') if args.kinds else list(JOB_KINDS)
+    handlers = {kind: JOB_KINDS[kind][1] for kind in kinds}
+    run_workers(job_queue(), handlers, args.workers, config.JOB_POLL_SECONDS, BATCH_SIZES)
+
+
+def queue_command(args):
+    _, _, where = JOB_KINDS[args.kind]
+    print(f'queued {job_queue().enqueue_where(args.kind, where)} {args.kind} jobs')
+
+
+def status_command(args):
+    status = job_queue().status()
+    if not status:
+        print('no jobs')
+    for kind, counts in sorted(status.items()):
+        print(kind.ljust(10), '  '.join(f'{state} {count}' for state, count in counts.items()))
+    staging = store.staging_status()
+    if staging['staged']:
+        print('import'.ljust(10), '  '.join(f'{name} {count}' for name, count in staging.items()))
+
+
+def import_command(args):
+    import importer
+
+    if args.feeds:
+        result = importer.stage_feeds()
+        print(f"polled {result['channels']} channel feeds: {result['unchanged']} unchanged, {result['failed']} failed, "
+              f"{result['videos']} new uploads, {result['known']} already imported, {result['staged']} new")
+    elif not args.resume:
+        driver = importer.open_home_page()
+        importer.load_feed(driver, lambda seen, known: print(f'scrolled past {seen} videos, last {known} already imported'))
+        videos = importer.extract_videos(driver)
+        known, staged = importer.stage_videos(videos)
+        print(f'found {len(videos)} videos, {known} already imported, {staged} new')
+    run, claimed = importer.claim_videos()
+    print(f'importing {len(claimed)} staged videos')
+
+    def on_event(kind, stage_name, video_data, error):
+        if kind == 'done' and stage_name == 'persist':
+            print(f"{video_data['title']} - {video_data['category']}")
+        elif kind == 'error':
+            print(f"error in {stage_name} for {video_data['link']}: {error}")
+
+    importer.import_videos(run, claimed, on_event)
+
+
+def captions_command(args):
+    from captions import (CaptionFetcher, FixtureCaptionSource, captions_to_text, decompress_captions,
+                          record_fixture)
+
+    if args.rederive:
+        batch, count = [], 0
+        for video_id, data in store.stored_captions():
+            batch.append((video_id, captions_to_text(decompress_captions(data), args.timestamps)))
+            if len(batch) == 200:
+                store.update_subtitles(batch)
+                count, batch = count + len(batch), []
+        if batch:
+            store.update_subtitles(batch)
+        print(f'rebuilt the subtitles of {count + len(batch)} videos from their stored captions')
+        return
+
+    fetcher = caption_fetcher()
+    if args.fixtures:
+        fetcher = CaptionFetcher(FixtureCaptionSource(args.fixtures), config.CAPTION_WORKERS,
+                                 config.CAPTION_HOST_CONCURRENCY, config.CAPTION_HOST_INTERVAL)
+    video_ids = {link: video_id for video_id, link in store.videos_needing_subtitles(args.limit)}
+    print(f'fetching captions for {len(video_ids)} videos, {fetcher.workers} at a time')
+    found = failed = 0
+    for link, captions, error in fetcher.fetch_many(video_ids):
+        if error:
+            failed += 1
+            print(f'error getting captions for {link}: {error}')
+            continue
+        if captions and args.record:
+            record_fixture(args.record, link, captions)
+        found += save_captions(video_ids[link], captions)
+    print(f'{found} videos got captions, {len(video_ids) - found - failed} have none, {failed} failed')
+
+
+def thumbnails_command(args):
+    from resources import thumbnail_store
+
+    thumbnails = thumbnail_store()
+    # videos whose thumbnail was never downloaded, or was evicted from the store since
+    video_ids = {url: video_id for video_id, url, name in store.videos_with_thumbnails(args.limit)
+                 if not thumbnails.path(name)}
+    print(f'downloading {len(video_ids)} thumbnails, {thumbnails.workers} at a time')
+    files, failed = [], 0
+    for url, name, error in thumbnails.fetch_many(video_ids):
+        if error:
+            failed += 1
+            print(f'error getting {url}: {error}')
+            continue
+        files.append((video_ids[url], name))
+        if len(files) == 200:
+            store.update_thumbnail_files(files)
+            files = []
+    if files:
+        store.update_thumbnail_files(files)
+    print(f'stored {len(video_ids) - failed} thumbnails in {config.THUMBNAIL_DIR} '
+          f'({thumbnails.size / 1e6:.1f} MB in the store), {failed} failed')
+
+
+def backup_command(args):
+    from backup import backup_files, run_backup
+
+    day = args.day or datetime.now().strftime('%Y%m%d')
+    existing = [path for backup_day, path in backup_files(config.BACKUP_DIR) if backup_day == day]
+    if existing:
+        print(f'{existing[0]} already exists')
+        return 1
+    result = run_backup(config.BACKUP_DIR, args.format, config.BACKUP_JOBS, day)
+    if result is None:
+        print('another process is making this backup')
+        return 1
+    print(f"{result['file']}: {result['bytes'] / 1e6:.1f} MB in {result['seconds']:.1f}s")
+
+
+def check_indexes_command(args):
+    failed = 0
+    for row in store.check_indexes():
+        failed += not row['ok']
+        print('ok  ' if row['ok'] else 'FAIL', row['query'].ljust(40), row['indexes used'])
+    return 1 if failed else 0
+
+
+def train_classifier_command(args):
+    from categorize import train_classifier
+
+    report, _ = train_classifier()
+    print(f"trained on {report['examples']} holdout videos in {report['train_seconds']:.1f}s: "
+          f"accuracy {report['accuracy']:.0%}, confident {report['coverage']:.0%}, "
+          f"accuracy when confident {report['confident_accuracy']:.0%}; saved to {config.CLASSIFIER_PATH}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m youtuber')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    worker = commands.add_parser('worker', help='process queued background jobs until interrupted')
+    worker.add_argument('--workers', type=int, default=config.JOB_WORKERS, help='worker threads in this process')
+    worker.add_argument('--kinds', help='comma separated job kinds to process (default: all)')
+    worker.add_argument('--metrics-port', type=int, help='serve Prometheus metrics on this port')
+    worker.set_defaults(func=worker_command)
+
+    queue = commands.add_parser('queue', help='queue a job for every video that needs one of this kind')
+    queue.add_argument('kind', choices=list(JOB_KINDS))
+    queue.set_defaults(func=queue_command)
+
+    captions = commands.add_parser('captions', help='fetch the captions of every video without subtitles')
+    captions.add_argument('--limit', type=int, help='only the newest N videos')
+    captions.add_argument('--fixtures', help='read recorded captions from this directory instead of YouTube')
+    captions.add_argument('--record', help='also save the fetched captions to this directory as fixtures')
+    captions.add_argument('--rederive', action='store_true',
+                          help="rebuild every video's subtitles from its stored captions, without fetching")
+    captions.add_argument('--timestamps', action=argparse.BooleanOptionalAction, default=config.SUBTITLE_TIMESTAMPS,
+                          help='with --rederive: start every caption line with its time')
+    captions.set_defaults(func=captions_command)
+
+    thumbnails = commands.add_parser('thumbnails', help='download and shrink the thumbnails missing from THUMBNAIL_DIR')
+    thumbnails.add_argument('--limit', type=int, help='only the newest N videos')
+    thumbnails.set_defaults(func=thumbnails_command)
+
+    commands.add_parser('status', help='show the job queue').set_defaults(func=status_command)
+    import_ = commands.add_parser('import', help='import the home feed in Chrome')
+    source = import_.add_mutually_exclusive_group()
+    source.add_argument('--feeds', action='store_true',
+                        help="import the new uploads of the FEED_CHANNELS from their feeds instead, without a browser")
+    source.add_argument('--resume', action='store_true',
+                        help='only finish the videos staged by earlier imports, without opening the browser')
+    import_.set_defaults(func=import_command)
+    backup = commands.add_parser('backup', help='dump the database to BACKUP_DIR now')
+    backup.add_argument('--format', choices=['custom', 'directory'], default=config.BACKUP_FORMAT)
+    backup.add_argument('--day', help='YYYYMMDD in the file name (default: today); an existing backup is kept')
+    backup.set_defaults(func=backup_command)
+
+    commands.add_parser('check-indexes', help='check that the hot queries use their indexes').set_defaults(
+        func=check_indexes_command)
+    commands.add_parser('train-classifier', help='retrain the local category classifier').set_defaults(
+        func=train_classifier_command)
+
+    args = parser.parse_args(argv)
+    return args.func(args) or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""Settings, read from the environment (and .env) once at import.
+
+Every entry point imports this first, so it must stay cheap: no third-party imports
+besides python-dotenv.
+"""
+import os
+import sys
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Required environment variables
+REQUIRED_ENV_VARS = [
+    'MODEL', 'MAX_TOKENS', 'OPENAI_API_KEY', 'YOUTUBE_USERNAME',
+    'YOUTUBE_PASSWORD', 'ALLOW_ANY_CATEGORY',
+    'CATEGORIES',
+    'POSTGRES_DB', 'POSTGRES_USER', 'POSTGRES_PASSWORD', 'POSTGRES_HOST'
+]
+
+# Validate environment variables
+missing_or_blank = []
+for var in REQUIRED_ENV_VARS:
+    value = os.getenv(var)
+    if value is None or value.strip() == '':
+        missing_or_blank.append(var)
+
+if missing_or_blank:
+    from rich import print
+    print(f"[red]Error: The following environment variables are missing or blank in .env file:[/red]")
+    for var in missing_or_blank:
+        print(f"[red]  - {var}[/red]")
+    print("[red]Please ensure all required variables are set in your .env file.[/red]")
+    sys.exit(1)
+
+MODEL = os.getenv('MODEL')
+MAX_TOKENS = int(os.getenv('MAX_TOKENS'))
+OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+
+# OpenAI account limits and how many requests may be in flight at once
+OPENAI_RPM = int(os.getenv('OPENAI_RPM', '500'))
+OPENAI_TPM = int(os.getenv('OPENAI_TPM', '200000'))
+LLM_WORKERS = int(os.getenv('LLM_WORKERS', '8'))
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '6'))
+
+# dollars per million prompt and completion tokens, for the cost shown at /?action=stats
+LLM_PRICE_PROMPT = float(os.getenv('LLM_PRICE_PROMPT', '0.15'))
+LLM_PRICE_COMPLETION = float(os.getenv('LLM_PRICE_COMPLETION', '0.60'))
+
+# serve metrics in the Prometheus text format on this port (web app; workers take --metrics-port)
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+
+# on-disk cache of LLM answers so re-running the same transcript costs nothing
+LLM_CACHE_DIR = os.getenv('LLM_CACHE_DIR', '.llm_cache')
+LLM_CACHE_TTL_DAYS = float(os.getenv('LLM_CACHE_TTL_DAYS', '30'))
+LLM_CACHE_MAX_MB = float(os.getenv('LLM_CACHE_MAX_MB', '200'))
+
+# Summaries are built from token-sized transcript chunks (with overlap) summarized in
+# parallel and then combined; the budget caps how many transcript tokens one video may use
+SUMMARY_CHUNK_TOKENS = int(os.getenv('SUMMARY_CHUNK_TOKENS', '3000'))
+SUMMARY_CHUNK_OVERLAP = int(os.getenv('SUMMARY_CHUNK_OVERLAP', '150'))
+SUMMARY_TOKEN_BUDGET = int(os.getenv('SUMMARY_TOKEN_BUDGET', '30000'))
+SUMMARY_OUTPUT_TOKENS = int(os.getenv('SUMMARY_OUTPUT_TOKENS', '1024'))
+
+# an overlap as large as the chunk would cut a transcript into thousands of chunks
+if not 0 <= SUMMARY_CHUNK_OVERLAP < SUMMARY_CHUNK_TOKENS:
+    from rich import print
+    print(f"[red]Error: SUMMARY_CHUNK_OVERLAP ({SUMMARY_CHUNK_OVERLAP}) must be at least 0 and less than "
+          f"SUMMARY_CHUNK_TOKENS ({SUMMARY_CHUNK_TOKENS}).[/red]")
+    sys.exit(1)
+
+YOUTUBE_USERNAME = os.getenv('YOUTUBE_USERNAME')
+YOUTUBE_PASSWORD = os.getenv('YOUTUBE_PASSWORD')
+
+
+# Starting list of categories (from .env). The AI will use this and may add more if ALLOW_ANY_CATEGORY is True.
+CATEGORIES = {c.strip() for c in os.getenv('CATEGORIES').split(',') if c.strip()}
+
+# set this to True to allow the AI to invent new categories
+ALLOW_ANY_CATEGORY = os.getenv('ALLOW_ANY_CATEGORY', 'False').lower() in ('true', '1', 'yes')
+
+POSTGRES_DB = os.getenv('POSTGRES_DB')
+POSTGRES_USER = os.getenv('POSTGRES_USER')
+POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD')
+POSTGRES_HOST = os.getenv('POSTGRES_HOST')
+# connections are pooled and lent out per unit of work; idle ones are pinged before reuse
+POSTGRES_POOL_MIN = int(os.getenv('POSTGRES_POOL_MIN', '1'))
+POSTGRES_POOL_MAX = int(os.getenv('POSTGRES_POOL_MAX', '10'))
+POSTGRES_POOL_CHECK_SECONDS = float(os.getenv('POSTGRES_POOL_CHECK_SECONDS', '30'))
+
+# Local category classifier: confident predictions skip the LLM entirely
+CLASSIFIER_PATH = os.getenv('CLASSIFIER_PATH', 'category_classifier.npz')
+CLASSIFIER_MIN_SCORE = float(os.getenv('CLASSIFIER_MIN_SCORE', '0.35'))
+CLASSIFIER_MIN_MARGIN = float(os.getenv('CLASSIFIER_MIN_MARGIN', '0.1'))
+
+# 'dom' reads the feed with one injected script, 'html' parses the whole page source with BeautifulSoup
+EXTRACTION_MODE = os.getenv('EXTRACTION_MODE', 'dom').lower()
+# set to a file name to save the scrolled home page HTML for debugging
+SAVE_HOME_PAGE_HTML = os.getenv('SAVE_HOME_PAGE_HTML', '')
+
+# the feed stops scrolling once this many videos in a row are already imported (0 scrolls to the end),
+# and each scroll waits at most this long for new videos to appear
+SCROLL_STOP_AFTER_KNOWN = int(os.getenv('SCROLL_STOP_AFTER_KNOWN', '20'))
+SCROLL_WAIT_SECONDS = float(os.getenv('SCROLL_WAIT_SECONDS', '10'))
+
+# videos shown per page on the home page
+HOMEPAGE_PAGE_SIZE = int(os.getenv('HOMEPAGE_PAGE_SIZE', '50'))
+
+# Background jobs (subtitles, summaries, themes) run by `python -m youtuber worker`: worker threads per
+# process, attempts before a job is dead, seconds a claimed job is leased for, first retry delay (doubles)
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '4'))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '5'))
+JOB_VISIBILITY_TIMEOUT = int(os.getenv('JOB_VISIBILITY_TIMEOUT', '900'))
+JOB_RETRY_DELAY = int(os.getenv('JOB_RETRY_DELAY', '30'))
+JOB_POLL_SECONDS = float(os.getenv('JOB_POLL_SECONDS', '5'))
+
+# Caption fetching: parallel fetches for `python -m youtuber captions`, and per host at most
+# CAPTION_HOST_CONCURRENCY requests in flight started at least CAPTION_HOST_INTERVAL seconds apart
+CAPTION_WORKERS = int(os.getenv('CAPTION_WORKERS', '8'))
+CAPTION_HOST_CONCURRENCY = int(os.getenv('CAPTION_HOST_CONCURRENCY', '4'))
+CAPTION_HOST_INTERVAL = float(os.getenv('CAPTION_HOST_INTERVAL', '0.2'))
+# read captions from recorded <video id>.json files in this directory instead of YouTube
+CAPTION_FIXTURES_DIR = os.getenv('CAPTION_FIXTURES_DIR')
+# prefix every caption line of the subtitles text with its time, e.g. "[12:34] ..."
+SUBTITLE_TIMESTAMPS = os.getenv('SUBTITLE_TIMESTAMPS', 'false').lower() == 'true'
+
+# Daily backups, made in the background: where they go, how many are kept, pg_dump's format
+# (custom: one file streamed through zstd or gzip; directory: dumped by BACKUP_JOBS connections)
+BACKUP_DIR = os.getenv('BACKUP_DIR', '.')
+BACKUP_KEEP = int(os.getenv('BACKUP_KEEP', '5'))
+BACKUP_FORMAT = os.getenv('BACKUP_FORMAT', 'custom')
+BACKUP_JOBS = int(os.getenv('BACKUP_JOBS', '4'))
+
+# Local thumbnails: where the shrunk copies are kept and how much space they may use, the width they
+# are scaled to (the home page column is about half that wide, so they stay sharp on high-DPI screens),
+# webp or jpeg, parallel downloads, and a stand-in for https://i.ytimg.com (e.g. a local test server)
+THUMBNAIL_DIR = os.getenv('THUMBNAIL_DIR', '.thumbnails')
+THUMBNAIL_CACHE_MB = float(os.getenv('THUMBNAIL_CACHE_MB', '200'))
+THUMBNAIL_WIDTH = int(os.getenv('THUMBNAIL_WIDTH', '240'))
+THUMBNAIL_FORMAT = os.getenv('THUMBNAIL_FORMAT', 'webp')
+THUMBNAIL_QUALITY = int(os.getenv('THUMBNAIL_QUALITY', '70'))
+THUMBNAIL_WORKERS = int(os.getenv('THUMBNAIL_WORKERS', '8'))
+THUMBNAIL_SOURCE_URL = os.getenv('THUMBNAIL_SOURCE_URL')
+
+# Importing from channel feeds instead of the home page: channel ids, @handles or channel URLs, comma
+# separated, and/or the subscriptions.csv of a Google Takeout export; the feeds are polled FEED_WORKERS at
+# a time from FEED_BASE_URL (e.g. a local test server), and a channel's first poll goes FEED_FIRST_POLL_DAYS back
+FEED_CHANNELS = os.getenv('FEED_CHANNELS', '')
+FEED_SUBSCRIPTIONS_FILE = os.getenv('FEED_SUBSCRIPTIONS_FILE')
+FEED_BASE_URL = os.getenv('FEED_BASE_URL', 'https://www.youtube.com')
+FEED_WORKERS = int(os.getenv('FEED_WORKERS', '16'))
+FEED_HOST_CONCURRENCY = int(os.getenv('FEED_HOST_CONCURRENCY', '8'))
+FEED_FIRST_POLL_DAYS = int(os.getenv('FEED_FIRST_POLL_DAYS', '7'))
+
+# Import pipeline concurrency: workers per stage and the queue size between stages
+IMPORT_THUMBNAIL_WORKERS = int(os.getenv('IMPORT_THUMBNAIL_WORKERS', '4'))
+IMPORT_CAPTION_WORKERS = int(os.getenv('IMPORT_CAPTION_WORKERS', '4'))
+IMPORT_SUMMARY_WORKERS = int(os.getenv('IMPORT_SUMMARY_WORKERS', '4'))
+IMPORT_CATEGORY_WORKERS = int(os.getenv('IMPORT_CATEGORY_WORKERS', '2'))
+IMPORT_QUEUE_SIZE = int(os.getenv('IMPORT_QUEUE_SIZE', '10'))
+# seconds an import run holds its staged videos without renewing its lease (renewed every third of this);
+# after that another run may take them over, e.g. when the first one crashed
+IMPORT_LEASE_SECONDS = int(os.getenv('IMPORT_LEASE_SECONDS', '300'))
+# new videos are inserted and committed this many at a time
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', '25'))
+# videos categorized together in one LLM request
+CATEGORIZE_BATCH_SIZE = int(os.getenv('CATEGORIZE_BATCH_SIZE', '20'))
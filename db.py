@@ -0,0 +1,91 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
+
+import metrics
+
+
+class Database:
+    """A pool of PostgreSQL connections shared by every session and worker thread.
+
+    `connection()` lends a connection for one unit of work: it is committed when the
+    block finishes, rolled back if it raises, and returned to the pool either way, so a
+    failed statement never leaks into somebody else's transaction.  When all `maxconn`
+    connections are lent out callers wait for one instead of failing.  A connection that
+    sat idle for more than `check_after` seconds is pinged before it is handed out, and
+    replaced if the server went away.
+    """
+
+    def __init__(self, minconn=1, maxconn=10, check_after=30.0, **connect_kwargs):
+        self.pool = ThreadedConnectionPool(minconn, maxconn, **connect_kwargs)
+        self.slots = threading.BoundedSemaphore(maxconn)
+        self.check_after = check_after
+        self.last_used = {}
+        self.lock = threading.Lock()
+
+    def _healthy(self, conn):
+        if conn.closed:
+            return False
+        with self.lock:
+            idle = time.monotonic() - self.last_used.get(id(conn), 0)
+        if idle < self.check_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute('SELECT 1')
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _get(self):
+        for _ in range(3):
+            conn = self.pool.getconn()
+            if self._healthy(conn):
+                return conn
+            print('discarding broken database connection')
+            self.pool.putconn(conn, close=True)
+        return self.pool.getconn()
+
+    def _put(self, conn):
+        broken = conn.closed or conn.info.transaction_status == extensions.TRANSACTION_STATUS_UNKNOWN
+        with self.lock:
+            if broken:
+                self.last_used.pop(id(conn), None)
+            else:
+                self.last_used[id(conn)] = time.monotonic()
+        self.pool.putconn(conn, close=bool(broken))
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of the block and commit it at the end."""
+        waiting = time.perf_counter()
+        with self.slots:
+            conn = self._get()
+            borrowed = time.perf_counter()
+            metrics.observe('db_wait_seconds', borrowed - waiting)
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                if not conn.closed:
+                    conn.rollback()
+                raise
+            finally:
+                self._put(conn)
+                metrics.observe('db_connection_seconds', time.perf_counter() - borrowed)
+
+    @contextmanager
+    def cursor(self, dict_rows=False):
+        """A cursor on a borrowed connection; rows are dicts when `dict_rows` is set."""
+        with self.connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor if dict_rows else None) as cur:
+                yield cur
+
+    def close(self):
+        self.pool.closeall()
@@ -0,0 +1,326 @@
+"""Importing the signed-in YouTube home feed: the browser session, extraction and the import pipeline.
+
+The parsed feed is staged in the import_staging table before anything else happens, and
+every stage checkpoints its output there, so an import that crashes or is interrupted is
+resumed from the staged videos (`python -m youtuber import --resume`) without scraping or
+paying for the finished LLM calls again.  Besides the home page, the feed can come from the
+channels' Atom feeds (see feeds.py), which needs no browser at all.
+"""
+import codecs
+import os
+import re
+import socket
+import subprocess
+import threading
+import time
+import uuid
+
+import config
+import metrics
+import store
+from captions import captions_to_text, compress_captions
+from categorize import categorize_videos
+from pipeline import Pipeline, Stage
+from resources import caption_fetcher, thumbnail_store
+from scraper import (extract_records_from_browser, parse_videos_from_html, parse_videos_from_records, scroll_feed,
+                     thumbnail_from_link)
+from summaries import get_summary
+
+# the signed-in browser, kept for the life of the process so later imports skip the login
+_browser = {}
+
+
+def get_chromium_version():
+    """Detect Chromium/Chrome major version from the installed browser executable."""
+    import undetected_chromedriver as uc
+
+    try:
+        chrome_path = uc.find_chrome_executable()
+        if not chrome_path:
+            return None
+        result = subprocess.run(
+            [chrome_path, '--version'],
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+        if result.returncode != 0:
+            return None
+        # Output format: "Google Chrome 144.0.1234.56" or "Chromium 144.0.1234.56"
+        match = re.search(r'(\d+)\.', result.stdout.strip())
+        return int(match.group(1)) if match else None
+    except Exception:
+        return None
+
+
+def open_home_page():
+    """Return a browser showing the signed-in home page, starting Chrome and logging in the first time."""
+    import undetected_chromedriver as uc
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.common.keys import Keys
+
+    if 'driver' in _browser:
+        print('reloading driver state from session')
+        driver = _browser['driver']
+        driver.get('https://www.youtube.com/')
+    else:
+        chrome_kwargs = {'headless': False, 'use_subprocess': False, 'version_main': get_chromium_version()}
+        driver = uc.Chrome(**chrome_kwargs)
+        _browser['driver'] = driver
+
+        # Navigate to YouTube
+        driver.get('https://www.youtube.com/')
+        time.sleep(5)
+        sign_in_button = driver.find_element(By.XPATH, '//*[@id="buttons"]/ytd-button-renderer/yt-button-shape/a')
+        sign_in_button.click()
+        time.sleep(2)
+        email_input = driver.find_element(By.XPATH, '//input[@type="email"]')
+        email_input.send_keys(config.YOUTUBE_USERNAME)
+        email_input.send_keys(Keys.RETURN)
+        time.sleep(2)
+        password_input = driver.find_element(By.XPATH, '//input[@type="password"]')
+        password_input.send_keys(config.YOUTUBE_PASSWORD)
+        password_input.send_keys(Keys.RETURN)
+        time.sleep(15)  # Wait for the homepage to load
+    return driver
+
+
+@metrics.timed('import_step_seconds', step='scroll')
+def load_feed(driver, on_progress=None, report=print):
+    """Scroll the home feed until it is loaded (see scroll_feed) and make sure thumbnails are present.
+
+    `on_progress(seen, known)` is called as the feed grows and `report` receives status messages.
+    """
+    from selenium.webdriver.common.by import By
+
+    links = scroll_feed(driver, store.known_links, config.SCROLL_STOP_AFTER_KNOWN, config.SCROLL_WAIT_SECONDS,
+                        on_progress)
+
+    try:
+        show_more = driver.find_elements(By.XPATH, '//*[@id="dismissible"]/div[3]/ytd-button-renderer/yt-button-shape/button[@aria-label="Show more"]/yt-touch-feedback-shape/div/div[2]')
+        driver.execute_script("arguments[0].click();", show_more[1])
+    except:
+        pass
+
+    # Thumbnails can be derived from the video ID for every normal video, so lazy loading
+    # them is only needed when the feed has items without one (e.g. shorts)
+    if any(link and not thumbnail_from_link(link) for link in links):
+        # Force lazy-loaded thumbnails to load by scrolling back up slowly
+        report('Loading thumbnails...')
+        driver.execute_script("window.scrollTo(0, 0);")
+        time.sleep(1)
+
+        # Scroll down in chunks to trigger lazy loading
+        scroll_height = driver.execute_script("return document.documentElement.scrollHeight")
+        chunk_size = 800  # pixels per scroll
+        for pos in range(0, scroll_height, chunk_size):
+            driver.execute_script(f"window.scrollTo(0, {pos});")
+            time.sleep(0.3)
+
+
+@metrics.timed('import_step_seconds', step='extract')
+def extract_videos(driver, report=print):
+    """Read the video list off the loaded home page.
+
+    By default one injected script collects compact records inside the browser; with
+    EXTRACTION_MODE=html, or if the script fails, the whole page source is parsed with
+    BeautifulSoup instead.
+    """
+    if config.SAVE_HOME_PAGE_HTML:
+        with codecs.open(config.SAVE_HOME_PAGE_HTML, "w", encoding='utf-8') as f:
+            f.write(driver.page_source)
+
+    if config.EXTRACTION_MODE == 'dom':
+        try:
+            return parse_videos_from_records(extract_records_from_browser(driver))
+        except Exception as e:
+            print(f'in-browser extraction failed, falling back to page source: {e}')
+            report(f'In-browser extraction failed ({e}), parsing the page source instead')
+
+    # Get page source and parse with BeautifulSoup
+    return parse_videos_from_html(driver.page_source)
+
+
+def checkpoint(video_data, stage, **columns):
+    """Record a finished stage in import_staging; None drops the video if another run has taken it over."""
+    if store.checkpoint_staged(video_data['locked_by'], video_data['link'], stage, **columns):
+        video_data[f'{stage}_done'] = True
+        return video_data
+    print(f"another import took over {video_data['link']}")
+    return None
+
+
+@metrics.timed('import_step_seconds', step='thumbnail')
+def import_stage_thumbnail(video_data):
+    if video_data['thumbnail_done']:
+        return video_data
+    if video_data['thumbnail']:
+        try:
+            video_data['thumbnail_file'] = thumbnail_store().fetch(video_data['thumbnail'])
+        except Exception as e:
+            # the home page falls back to the original URL
+            print(f"Error getting the thumbnail for {video_data['link']}: {e}")
+    return checkpoint(video_data, 'thumbnail', thumbnail_file=video_data['thumbnail_file'])
+
+
+@metrics.timed('import_step_seconds', step='captions')
+def import_stage_captions(video_data):
+    if video_data['captions_done']:
+        return video_data
+    try:
+        with metrics.video_scope(video_data['link']):
+            captions = caption_fetcher().fetch(video_data['link'])
+        if captions:
+            video_data['captions'] = compress_captions(captions)
+            video_data['subtitles'] = captions_to_text(captions, config.SUBTITLE_TIMESTAMPS)
+    except Exception as e:
+        # imported without subtitles; the subtitles job can fetch them later
+        print(f"Error getting subtitles for {video_data['link']}: {e}")
+    return checkpoint(video_data, 'captions', captions=video_data['captions'], subtitles=video_data['subtitles'])
+
+
+@metrics.timed('import_step_seconds', step='summarize')
+def import_stage_summarize(video_data):
+    if video_data['summary_done']:
+        return video_data
+    if video_data['subtitles']:
+        with metrics.video_scope(video_data['link']):
+            video_data['summary'] = get_summary(video_data['title'] + ' - ' + video_data['subtitles'], config.MAX_TOKENS)
+    return checkpoint(video_data, 'summary', summary=video_data['summary'])
+
+
+@metrics.timed('import_step_seconds', step='categorize')
+def import_stage_categorize(batch):
+    pending = [video_data for video_data in batch if not video_data['category_done']]
+    if pending:
+        for video_data, category in zip(pending, categorize_videos(pending)):
+            video_data['category'] = category
+    return [checkpoint(video_data, 'category', category=video_data['category'])
+            if not video_data['category_done'] else video_data for video_data in batch]
+
+
+@metrics.timed('import_step_seconds', step='persist')
+def import_stage_persist(batch):
+    """Insert a batch of videos, removing them from staging in the same commit; one result per video."""
+    inserted = store.insert_videos(batch, staged_by=batch[0]['locked_by'])
+    metrics.inc('videos_imported_total', sum(result is True for result in inserted.values()))
+    return [video_data if inserted[video_data['link']] is True else inserted[video_data['link']]
+            for video_data in batch]
+
+
+# stage names in order, for progress displays
+IMPORT_STAGES = ('thumbnail', 'captions', 'summarize', 'categorize', 'persist')
+
+
+def stage_videos(videos):
+    """Stage the parsed feed for importing; returns (already imported, newly staged) counts."""
+    return store.stage_videos(videos)
+
+
+def feed_channel_ids(report=print):
+    """The channel ids from FEED_CHANNELS and FEED_SUBSCRIPTIONS_FILE; @handles are resolved once and remembered."""
+    from feeds import CHANNEL_ID, channel_ids_from_setting, channel_ids_from_subscriptions, resolve_channel_id
+
+    channels = channel_ids_from_setting(config.FEED_CHANNELS)
+    if config.FEED_SUBSCRIPTIONS_FILE:
+        channels += channel_ids_from_subscriptions(config.FEED_SUBSCRIPTIONS_FILE)
+    handles = [channel for channel in channels if not CHANNEL_ID.match(channel)]
+    resolved = store.feed_handles(handles) if handles else {}
+    channel_ids = []
+    for channel in channels:
+        if CHANNEL_ID.match(channel):
+            channel_ids.append(channel)
+        elif channel in resolved:
+            channel_ids.append(resolved[channel])
+        else:
+            try:
+                channel_ids.append(resolve_channel_id(channel))
+                store.save_feed_handle(channel, channel_ids[-1])
+            except Exception as e:
+                report(f'Could not find the channel {channel}: {e}')
+    return list(dict.fromkeys(channel_ids))
+
+
+@metrics.timed('import_step_seconds', step='feeds')
+def stage_feeds(report=print):
+    """Poll the configured channels' feeds and stage their new videos, without a browser.
+
+    Cursors are saved only after the videos are staged, so an interrupted poll finds
+    the same videos again.  Returns {'channels', 'unchanged', 'failed', 'videos', 'known', 'staged'}.
+    """
+    from feeds import FeedPoller
+
+    channel_ids = feed_channel_ids(report)
+    poller = FeedPoller(config.FEED_BASE_URL, config.FEED_WORKERS, config.FEED_HOST_CONCURRENCY,
+                        first_poll_days=config.FEED_FIRST_POLL_DAYS)
+    videos, cursors, unchanged, failed = [], [], 0, 0
+    for cursor, new_videos, error in poller.poll_many(store.feed_cursors(channel_ids)):
+        if error:
+            failed += 1
+            store.feed_failed(cursor['channel_id'], str(error))
+            report(f"Could not poll the feed of {cursor['channel_id']}: {error}")
+            continue
+        unchanged += cursor['status'] == 304
+        cursors.append(cursor)
+        videos.extend(new_videos)
+
+    # newest first, like the home feed
+    videos.sort(key=lambda video: video['published'], reverse=True)
+    known, staged = store.stage_videos(videos) if videos else (0, 0)
+    store.save_feed_cursors(cursors)
+    return {'channels': len(channel_ids), 'unchanged': unchanged, 'failed': failed, 'videos': len(videos),
+            'known': known, 'staged': staged}
+
+
+def claim_videos():
+    """Claim the staged videos no other import is working on; returns (run id, videos).
+
+    Besides what was just staged this picks up the videos an interrupted import left
+    behind, with whatever stages they had finished.
+    """
+    run = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+    return run, store.claim_staged(run, config.IMPORT_LEASE_SECONDS)
+
+
+def import_videos(run, videos, on_event):
+    """Run claimed videos through the thumbnail -> captions -> summarize -> categorize -> persist stages.
+
+    Each stage has its own worker pool (sized by the IMPORT_*_WORKERS settings) so the
+    network-bound caption and LLM calls for different videos overlap, and new rows are
+    written IMPORT_BATCH_SIZE at a time.  Stages a video already finished in an earlier
+    run are skipped.  `on_event(kind, stage_name, video, error)` is called on this thread
+    as videos move through the stages (see Pipeline.run).  The run's leases are renewed
+    while it works and released at the end, so the videos that failed are retried by the
+    next import.
+    """
+    stages = [
+        Stage('thumbnail', import_stage_thumbnail, config.IMPORT_THUMBNAIL_WORKERS),
+        Stage('captions', import_stage_captions, config.IMPORT_CAPTION_WORKERS),
+        Stage('summarize', import_stage_summarize, config.IMPORT_SUMMARY_WORKERS),
+        Stage('categorize', import_stage_categorize, config.IMPORT_CATEGORY_WORKERS, batch_size=config.CATEGORIZE_BATCH_SIZE),
+        Stage('persist', import_stage_persist, batch_size=config.IMPORT_BATCH_SIZE),
+    ]
+
+    def on_pipeline_event(kind, stage_name, video_data, error):
+        if kind == 'error':
+            store.fail_staged(run, video_data['link'], f'{stage_name}: {error}')
+        if on_event:
+            on_event(kind, stage_name, video_data, error)
+
+    stop = threading.Event()
+
+    def renew_leases():
+        while not stop.wait(config.IMPORT_LEASE_SECONDS / 3):
+            try:
+                store.renew_staged(run, config.IMPORT_LEASE_SECONDS)
+            except Exception as e:
+                print(f'renewing the import leases failed: {e}')
+
+    heartbeat = threading.Thread(target=renew_leases, name='import-leases', daemon=True)
+    heartbeat.start()
+    try:
+        Pipeline(stages, queue_size=config.IMPORT_QUEUE_SIZE).run(videos, on_pipeline_event)
+    finally:
+        stop.set()
+        heartbeat.join()
+        store.release_staged(run)
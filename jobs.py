@@ -0,0 +1,190 @@
+import os
+import socket
+import threading
+import time
+import traceback
+
+import metrics
+
+# queued -> running -> done, or back to queued after a failure, or dead once out of attempts
+JOB_STATES = ('queued', 'running', 'done', 'dead')
+
+CLAIM_JOB_SQL = """UPDATE jobs
+                   SET state = 'running', attempts = attempts + 1, locked_by = %(worker)s,
+                       locked_until = NOW() + %(timeout)s * INTERVAL '1 second', updated = NOW()
+                   WHERE id IN (SELECT id FROM jobs
+                                WHERE kind = ANY(%(kinds)s)
+                                  AND ((state = 'queued' AND run_after <= NOW())
+                                       OR (state = 'running' AND locked_until < NOW()
+                                           AND attempts < %(max_attempts)s))
+                                ORDER BY id
+                                LIMIT %(limit)s
+                                FOR UPDATE SKIP LOCKED)
+                   RETURNING id, kind, video_id, attempts"""
+
+# a job whose worker crashed or hung on every attempt never reaches fail(), so it dies here
+EXPIRE_JOBS_SQL = """UPDATE jobs
+                     SET state = 'dead', locked_until = NULL, last_error = 'lease expired', updated = NOW()
+                     WHERE kind = ANY(%(kinds)s) AND state = 'running' AND locked_until < NOW()
+                       AND attempts >= %(max_attempts)s"""
+
+
+class Job:
+    def __init__(self, id, kind, video_id, attempts):
+        self.id = id
+        self.kind = kind
+        self.video_id = video_id
+        self.attempts = attempts
+
+    def __repr__(self):
+        return f'Job({self.id}, {self.kind!r}, video {self.video_id}, attempt {self.attempts})'
+
+
+class JobQueue:
+    """Durable per-video jobs in the `jobs` table, shared by any number of worker processes.
+
+    Workers claim the oldest ready job with FOR UPDATE SKIP LOCKED, so they never block on
+    or double-claim each other's rows.  A claimed job is leased for `visibility_timeout`
+    seconds; if its worker dies the lease runs out and another worker picks it up.  A failed
+    job is retried after `retry_delay` seconds, doubling each attempt, and is marked dead
+    after `max_attempts`.  At most one queued or running job exists per video and kind.
+    """
+
+    def __init__(self, database, visibility_timeout=900, max_attempts=5, retry_delay=30):
+        self.db = database
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+    def enqueue(self, kind, video_ids):
+        """Queue `kind` jobs for the given videos, skipping ones already pending; returns how many were added."""
+        with self.db.cursor() as cur:
+            cur.execute("""INSERT INTO jobs (kind, video_id) SELECT %s, unnest(%s::INT[])
+                           ON CONFLICT DO NOTHING""", (kind, list(video_ids)))
+            return cur.rowcount
+
+    def enqueue_where(self, kind, where, params=()):
+        """Queue `kind` jobs for every video matching the SQL condition `where`; returns how many were added."""
+        with self.db.cursor() as cur:
+            cur.execute(f"""INSERT INTO jobs (kind, video_id) SELECT %s, id FROM videos WHERE {where}
+                            ON CONFLICT DO NOTHING""", (kind, *params))
+            return cur.rowcount
+
+    def claim(self, kinds, worker, limit=1):
+        """Lease up to `limit` of the oldest ready jobs of the given kinds; returns them oldest first."""
+        params = {'worker': worker, 'timeout': self.visibility_timeout, 'kinds': list(kinds),
+                  'max_attempts': self.max_attempts, 'limit': limit}
+        with self.db.cursor() as cur:
+            cur.execute(EXPIRE_JOBS_SQL, params)
+            cur.execute(CLAIM_JOB_SQL, params)
+            rows = cur.fetchall()
+        return sorted((Job(*row) for row in rows), key=lambda job: job.id)
+
+    def complete(self, job, worker):
+        with self.db.cursor() as cur:
+            cur.execute("""UPDATE jobs SET state = 'done', locked_until = NULL, last_error = NULL, updated = NOW()
+                           WHERE id = %s AND state = 'running' AND locked_by = %s AND attempts = %s""",
+                        (job.id, worker, job.attempts))
+
+    def fail(self, job, worker, error):
+        """Put the job back with a delay, or mark it dead once it has used up its attempts."""
+        dead = job.attempts >= self.max_attempts
+        delay = self.retry_delay * 2 ** (job.attempts - 1)
+        with self.db.cursor() as cur:
+            cur.execute("""UPDATE jobs SET state = %s, locked_until = NULL, last_error = %s, updated = NOW(),
+                                           run_after = NOW() + %s * INTERVAL '1 second'
+                           WHERE id = %s AND state = 'running' AND locked_by = %s AND attempts = %s""",
+                        ('dead' if dead else 'queued', error, delay, job.id, worker, job.attempts))
+
+    def requeue_dead(self, kind=None):
+        """Give dead jobs (of one kind, or all) a fresh set of attempts; returns how many."""
+        with self.db.cursor() as cur:
+            cur.execute("""UPDATE jobs SET state = 'queued', attempts = 0, run_after = NOW(), updated = NOW()
+                           WHERE state = 'dead' AND (%s::VARCHAR IS NULL OR kind = %s)""", (kind, kind))
+            return cur.rowcount
+
+    def status(self):
+        """{kind: {state: count}} for every kind with jobs; expired leases count as queued."""
+        with self.db.cursor() as cur:
+            cur.execute("""SELECT kind, CASE WHEN state = 'running' AND locked_until < NOW() THEN 'queued'
+                                             ELSE state END, count(*)
+                           FROM jobs GROUP BY 1, 2""")
+            rows = cur.fetchall()
+        status = {}
+        for kind, state, count in rows:
+            status.setdefault(kind, dict.fromkeys(JOB_STATES, 0))[state] += count
+        return status
+
+    def failures(self, limit=20):
+        """The most recent failed or dead jobs as (id, kind, video_id, state, attempts, last_error)."""
+        with self.db.cursor() as cur:
+            cur.execute("""SELECT id, kind, video_id, state, attempts, last_error FROM jobs
+                           WHERE last_error IS NOT NULL AND state IN ('queued', 'dead')
+                           ORDER BY updated DESC LIMIT %s""", (limit,))
+            return cur.fetchall()
+
+
+def worker_name(index=0):
+    return f'{socket.gethostname()}:{os.getpid()}:{index}'
+
+
+def run_jobs(queue, handlers, worker, batch_sizes):
+    """Claim and run the next job (or batch of jobs); returns False if there was nothing to do."""
+    jobs = queue.claim(handlers, worker)
+    if not jobs:
+        return False
+    kind = jobs[0].kind
+    batch_size = batch_sizes.get(kind)
+    if batch_size and batch_size > 1:
+        jobs += queue.claim([kind], worker, batch_size - 1)
+    print(f'{worker} running {", ".join(map(repr, jobs))}')
+    try:
+        with metrics.timer('job_seconds', kind=kind):
+            if batch_size:
+                handlers[kind]([job.video_id for job in jobs])
+            else:
+                with metrics.video_scope(jobs[0].video_id):
+                    handlers[kind](jobs[0].video_id)
+    except Exception as e:
+        print(f'{worker} {jobs} failed: {e}')
+        for job in jobs:
+            queue.fail(job, worker, ''.join(traceback.format_exception_only(e)).strip())
+    else:
+        for job in jobs:
+            queue.complete(job, worker)
+    return True
+
+
+def work(queue, handlers, worker, stop, poll_seconds=5.0, batch_sizes=None):
+    """Claim and run jobs until `stop` is set.
+
+    `handlers` maps each job kind to a function of the video id, or, for the kinds in
+    `batch_sizes`, to a function of a list of up to that many video ids.
+    """
+    while not stop.is_set():
+        try:
+            if not run_jobs(queue, handlers, worker, batch_sizes or {}):
+                stop.wait(poll_seconds)
+        except Exception as e:
+            # e.g. the database went away; keep the thread alive and try again later
+            print(f'{worker} error: {e}')
+            stop.wait(poll_seconds)
+
+
+def run_workers(queue, handlers, count=4, poll_seconds=5.0, batch_sizes=None):
+    """Run `count` worker threads in this process until interrupted."""
+    stop = threading.Event()
+    threads = [threading.Thread(target=work, args=(queue, handlers, worker_name(i), stop, poll_seconds, batch_sizes),
+                                name=f'job-worker-{i}', daemon=True)
+               for i in range(count)]
+    for thread in threads:
+        thread.start()
+    print(f'{count} workers processing {", ".join(handlers)} jobs; Ctrl-C to stop')
+    try:
+        while any(thread.is_alive() for thread in threads):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print('stopping workers after their current job')
+        stop.set()
+        for thread in threads:
+            thread.join()
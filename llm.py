@@ -0,0 +1,344 @@
+import contextvars
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from glob import glob
+
+import openai
+import tiktoken
+
+import metrics
+
+
+def estimate_tokens(text):
+    """Rough token count for rate limiting (about 4 characters per token for English)."""
+    return len(text) // 4 + 1
+
+
+def get_encoding(model):
+    """Tokenizer for `model`, falling back to the current OpenAI encoding for unknown models."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding('o200k_base')
+
+
+def split_tokens(text, encoding, chunk_tokens, overlap=0):
+    """Split `text` into pieces of at most `chunk_tokens` tokens, each repeating the last
+    `overlap` tokens of the one before so sentences cut at a boundary keep their context."""
+    if not 0 <= overlap < chunk_tokens:
+        raise ValueError(f'overlap ({overlap}) must be at least 0 and less than chunk_tokens ({chunk_tokens})')
+    tokens = encoding.encode(text)
+    if len(tokens) <= chunk_tokens:
+        return [text] if text else []
+    step = chunk_tokens - overlap
+    return [encoding.decode(tokens[start:start + chunk_tokens])
+            for start in range(0, len(tokens) - overlap, step)]
+
+
+def spread(items, limit):
+    """Pick at most `limit` items evenly from the whole list, always keeping the first and last."""
+    if len(items) <= limit:
+        return items
+    if limit == 1:
+        return items[:1]
+    return [items[round(i * (len(items) - 1) / (limit - 1))] for i in range(limit)]
+
+
+def group_by_tokens(texts, encoding, max_tokens):
+    """Pack consecutive texts into groups of at most `max_tokens` tokens (at least one text each)."""
+    groups = []
+    current = []
+    current_tokens = 0
+    for text in texts:
+        tokens = len(encoding.encode(text))
+        if current and current_tokens + tokens > max_tokens:
+            groups.append(current)
+            current = []
+            current_tokens = 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+
+class RateLimiter:
+    """Token buckets for the account's requests-per-minute and tokens-per-minute limits.
+
+    Both buckets start full and refill continuously.  `acquire` blocks until one request
+    and `tokens` tokens are available, and `pause` stops everybody for a while when the
+    API tells us to back off.
+    """
+
+    def __init__(self, rpm, tpm):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.requests = float(rpm)
+        self.tokens = float(tpm)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self.updated
+        self.updated = now
+        self.requests = min(self.rpm, self.requests + elapsed * self.rpm / 60)
+        self.tokens = min(self.tpm, self.tokens + elapsed * self.tpm / 60)
+
+    def acquire(self, tokens):
+        # a single request bigger than the whole bucket would otherwise wait forever
+        tokens = min(tokens, self.tpm)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.paused_until and self.requests >= 1 and self.tokens >= tokens:
+                    self.requests -= 1
+                    self.tokens -= tokens
+                    return
+                wait = max(self.paused_until - now,
+                           (1 - self.requests) * 60 / self.rpm,
+                           (tokens - self.tokens) * 60 / self.tpm)
+            time.sleep(min(max(wait, 0.01), 5))
+
+    def refund(self, tokens):
+        """Give back (or, when negative, charge) the difference between estimated and actual usage."""
+        with self.lock:
+            self.tokens = min(self.tpm, self.tokens + tokens)
+
+    def pause(self, seconds):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+def retry_after_seconds(error):
+    """Return the delay the server asked for in a Retry-After style header, if any."""
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+    headers = response.headers
+    if headers.get('retry-after-ms'):
+        try:
+            return float(headers['retry-after-ms']) / 1000
+        except ValueError:
+            pass
+    value = headers.get('retry-after')
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError,
+                    openai.InternalServerError)
+
+
+class LLMExecutor:
+    """Runs OpenAI calls on a thread pool behind a shared RateLimiter.
+
+    Failed calls are retried with jittered exponential backoff, waiting at least as long
+    as a Retry-After header asks.  Any client method can be submitted, e.g.
+    `executor.submit(client.chat.completions.create, estimated_tokens, model=..., messages=...)`.
+    """
+
+    def __init__(self, workers=8, rpm=500, tpm=200000, max_retries=6, backoff=1.0, max_backoff=60.0, prices=(0, 0)):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='llm')
+        self.limiter = RateLimiter(rpm, tpm)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        # dollars per million (prompt, completion) tokens, for the cost counter
+        self.prices = prices
+
+    def submit(self, method, estimated_tokens, **kwargs):
+        """Schedule `method(**kwargs)` and return a Future for its response."""
+        # run in a copy of the caller's context, so usage is counted for the caller's metrics.video_scope
+        return self.pool.submit(contextvars.copy_context().run, self.call, method, estimated_tokens, **kwargs)
+
+    def run(self, fn, *args, **kwargs):
+        """Schedule `fn(*args, **kwargs)`, which should use `call`, and return a Future for its result."""
+        return self.pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+    def call(self, method, estimated_tokens, **kwargs):
+        """Call `method(**kwargs)` on this thread, respecting the rate limits and retrying."""
+        attempt = 0
+        model = kwargs.get('model', 'unknown')
+        while True:
+            with metrics.timer('llm_rate_limit_wait_seconds'):
+                self.limiter.acquire(estimated_tokens)
+            try:
+                with metrics.timer('llm_request_seconds', model=model):
+                    response = method(**kwargs)
+            except RETRYABLE_ERRORS as e:
+                metrics.inc('llm_retries_total', error=type(e).__name__)
+                if attempt >= self.max_retries:
+                    raise
+                delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+                retry_after = retry_after_seconds(e)
+                if retry_after is not None:
+                    delay = max(delay, retry_after)
+                    self.limiter.pause(retry_after)
+                attempt += 1
+                print(f'{type(e).__name__} from OpenAI, retry {attempt} in {delay:.1f}s')
+                time.sleep(delay)
+                continue
+
+            usage = getattr(response, 'usage', None)
+            if usage is not None and getattr(usage, 'total_tokens', None):
+                self.limiter.refund(estimated_tokens - usage.total_tokens)
+                self.count_usage(model, usage)
+            return response
+
+    def stream(self, method, estimated_tokens, **kwargs):
+        """Like `call` with stream=True, yielding the text of each chunk as it arrives on this thread.
+
+        Only opening the stream is retried; usage comes in the last chunk and is counted then.
+        """
+        model = kwargs.get('model', 'unknown')
+        started = time.perf_counter()
+        chunks = self.call(method, estimated_tokens, stream=True, stream_options={'include_usage': True}, **kwargs)
+        first = True
+        try:
+            for chunk in chunks:
+                if chunk.usage is not None and chunk.usage.total_tokens:
+                    self.limiter.refund(estimated_tokens - chunk.usage.total_tokens)
+                    self.count_usage(model, chunk.usage)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if first:
+                        metrics.observe('llm_first_token_seconds', time.perf_counter() - started, model=model)
+                        first = False
+                    yield chunk.choices[0].delta.content
+        finally:
+            chunks.close()
+
+    def count_usage(self, model, usage):
+        prompt = getattr(usage, 'prompt_tokens', 0) or 0
+        completion = getattr(usage, 'completion_tokens', 0) or 0
+        metrics.inc('llm_tokens_total', prompt, model=model, kind='prompt')
+        metrics.inc('llm_tokens_total', completion, model=model, kind='completion')
+        metrics.inc('llm_cost_dollars_total', (prompt * self.prices[0] + completion * self.prices[1]) / 1e6,
+                    model=model)
+
+
+def cache_key(*parts):
+    """Content address for an LLM request: a hash of everything that shapes the answer."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ResponseCache:
+    """Persistent on-disk cache of LLM answers keyed by `cache_key`.
+
+    Entries older than `ttl` seconds are ignored and removed.  When the cache grows past
+    `max_bytes` the least recently used entries (by file mtime, which a hit refreshes)
+    are deleted until it is back under 90% of the limit.
+    """
+
+    def __init__(self, directory, ttl, max_bytes):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'bypassed': 0, 'writes': 0, 'evictions': 0}
+        os.makedirs(directory, exist_ok=True)
+        self.size = sum(os.path.getsize(path) for path in self._files())
+
+    def _files(self):
+        return glob(os.path.join(self.directory, '*', '*.json'))
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.json')
+
+    def _count(self, name):
+        with self.lock:
+            self.stats[name] += 1
+        metrics.inc('llm_cache_total', result=name)
+
+    def get(self, key, bypass=False):
+        """Return the cached answer for `key`, or None.  `bypass` forces a miss (e.g. Retry)."""
+        if bypass:
+            self._count('bypassed')
+            return None
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._count('misses')
+            return None
+
+        if time.time() - entry['created'] > self.ttl:
+            self._remove(path)
+            self._count('misses')
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._count('hits')
+        return entry['response']
+
+    def put(self, key, response):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps({'created': time.time(), 'response': response})
+        # write then rename so readers on other threads never see half a file
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        # an overwrite (e.g. a retry that bypassed the cache) replaces the old file's bytes
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        os.replace(tmp_path, path)
+        self._count('writes')
+        with self.lock:
+            self.size += len(data) - replaced
+            over = self.size > self.max_bytes
+        if over:
+            self.evict()
+
+    def _remove(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        with self.lock:
+            self.size -= size
+
+    def evict(self):
+        files = []
+        for path in self._files():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+
+        with self.lock:
+            self.size = sum(size for _, size, _ in files)
+        target = self.max_bytes * 0.9
+        for mtime, size, path in files:
+            if self.size <= target and time.time() - mtime <= self.ttl:
+                continue
+            self._remove(path)
+            self._count('evictions')
+
+    def hit_rate(self):
+        lookups = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / lookups if lookups else 0.0
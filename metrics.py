@@ -0,0 +1,216 @@
+"""In-process metrics: latency histograms, counters and per-video LLM usage.
+
+Cheap enough to leave on everywhere: recording is a dict lookup and a few additions
+under a lock.  Every process (web app, workers, CLI) keeps its own numbers; they are
+shown at /?action=stats and, when started with `serve`, exported in the Prometheus text
+format at http://host:port/metrics.
+
+    with metrics.timer('caption_fetch_seconds'):
+        ...
+
+    @metrics.timed('summary_seconds')
+    def get_summary(...):
+        ...
+
+    with metrics.video_scope(link):
+        ...  # tokens and cost recorded in here are also added to this video's usage
+"""
+import bisect
+import contextvars
+import functools
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# upper bounds in seconds, from a fast query to a slow LLM request
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# how many videos' usage is kept for the stats page
+RECENT_VIDEOS = 500
+
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+_videos = OrderedDict()
+_current_video = contextvars.ContextVar('current_video', default=None)
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Estimate from the buckets: the upper bound of the bucket holding the q-th value."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return BUCKETS[i] if i < len(BUCKETS) else float('inf')
+        return float('inf')
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def observe(name, value, **labels):
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram()
+        histogram.observe(value)
+
+
+def inc(name, amount=1, **labels):
+    """Add to a counter; token and cost counters inside a video_scope also count for that video."""
+    key = _key(name, labels)
+    video = _current_video.get()
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+        if video is not None and (name.endswith('_tokens_total') or name.endswith('_dollars_total')):
+            usage = _videos.setdefault(video, {})
+            usage[name] = usage.get(name, 0) + amount
+            _videos.move_to_end(video)
+            while len(_videos) > RECENT_VIDEOS:
+                _videos.popitem(last=False)
+
+
+@contextmanager
+def timer(name, **labels):
+    """Observe the block's duration in histogram `name`, with an `outcome` label of ok or error."""
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield
+        outcome = 'ok'
+    finally:
+        observe(name, time.perf_counter() - started, outcome=outcome, **labels)
+
+
+def timed(name, **labels):
+    """Decorator form of `timer`."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timer(name, **labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def video_scope(video):
+    """Attribute the tokens and cost recorded in the block (on this thread) to `video`."""
+    token = _current_video.set(video)
+    try:
+        yield
+    finally:
+        _current_video.reset(token)
+
+
+def current_video():
+    return _current_video.get()
+
+
+def histograms():
+    """[(name, labels, count, sum, p50, p95, p99)] sorted by name and labels."""
+    with _lock:
+        rows = [(name, dict(labels), h.count, h.sum, h.quantile(0.5), h.quantile(0.95), h.quantile(0.99))
+                for (name, labels), h in _histograms.items()]
+    return sorted(rows, key=lambda row: (row[0], sorted(row[1].items())))
+
+
+def counters():
+    """[(name, labels, value)] sorted by name and labels."""
+    with _lock:
+        rows = [(name, dict(labels), value) for (name, labels), value in _counters.items()]
+    return sorted(rows, key=lambda row: (row[0], sorted(row[1].items())))
+
+
+def counter_total(name, **labels):
+    """Sum of counter `name` over every label set that includes `labels`."""
+    with _lock:
+        return sum(value for (counter, counter_labels), value in _counters.items()
+                   if counter == name and set(labels.items()) <= set(counter_labels))
+
+
+def video_usage():
+    """{video: {counter: amount}} for the most recent videos, newest last."""
+    with _lock:
+        return {video: dict(usage) for video, usage in _videos.items()}
+
+
+def _labels_text(labels, extra=None):
+    items = sorted(labels.items()) + (list(extra.items()) if extra else [])
+    if not items:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in items)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(items, escaped)) + '}'
+
+
+def prometheus_text(prefix='youtuber_'):
+    """Every metric in the Prometheus text exposition format."""
+    lines = []
+    typed = set()
+    for name, labels, value in counters():
+        if name not in typed:
+            lines.append(f'# TYPE {prefix}{name} counter')
+            typed.add(name)
+        lines.append(f'{prefix}{name}{_labels_text(labels)} {value}')
+    with _lock:
+        snapshot = [(name, dict(labels), list(h.counts), h.count, h.sum) for (name, labels), h in _histograms.items()]
+    for name, labels, counts, count, total in sorted(snapshot, key=lambda row: (row[0], sorted(row[1].items()))):
+        if name not in typed:
+            lines.append(f'# TYPE {prefix}{name} histogram')
+            typed.add(name)
+        cumulative = 0
+        for bound, bucket_count in zip(BUCKETS + ('+Inf',), counts):
+            cumulative += bucket_count
+            lines.append(f'{prefix}{name}_bucket{_labels_text(labels, {"le": bound})} {cumulative}')
+        lines.append(f'{prefix}{name}_sum{_labels_text(labels)} {total}')
+        lines.append(f'{prefix}{name}_count{_labels_text(labels)} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+_server = {}
+
+
+def serve(port, host='0.0.0.0'):
+    """Serve /metrics on `port` from a daemon thread; later calls in the same process do nothing."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = prometheus_text().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    with _lock:
+        if 'server' in _server:
+            return _server['server']
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+        _server['server'] = server
+    print(f'metrics at http://{host}:{port}/metrics')
+    return server
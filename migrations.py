@@ -0,0 +1,83 @@
+import json
+import os
+import re
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+# pg_advisory_lock key, so two app processes starting at once don't migrate concurrently
+MIGRATION_LOCK_ID = 7086001
+
+_MIGRATION_FILE = re.compile(r'^(\d+)_(\w+)\.sql$')
+
+
+def load_migrations(directory=MIGRATIONS_DIR):
+    """(version, name, path) of every NNNN_name.sql file in `directory`, in version order."""
+    migrations = []
+    for file_name in os.listdir(directory):
+        match = _MIGRATION_FILE.match(file_name)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(directory, file_name)))
+    migrations.sort()
+    versions = [version for version, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f'duplicate migration versions in {directory}')
+    return migrations
+
+
+def migrate(database, directory=MIGRATIONS_DIR):
+    """Apply the migrations that haven't run yet, each in its own transaction; returns their versions.
+
+    Applied versions are recorded in the schema_migrations table.  A session advisory lock
+    makes concurrent callers wait for each other instead of applying a migration twice.
+    """
+    applied_now = []
+    with database.connection() as conn, conn.cursor() as cur:
+        cur.execute('SELECT pg_advisory_lock(%s)', (MIGRATION_LOCK_ID,))
+        try:
+            cur.execute("""CREATE TABLE IF NOT EXISTS schema_migrations (
+                           version INT PRIMARY KEY,
+                           name VARCHAR NOT NULL,
+                           applied_at TIMESTAMP NOT NULL DEFAULT NOW()
+                           )""")
+            conn.commit()
+            cur.execute('SELECT version FROM schema_migrations')
+            applied = {row[0] for row in cur.fetchall()}
+
+            for version, name, path in load_migrations(directory):
+                if version in applied:
+                    continue
+                print(f'applying migration {version:04d}_{name}')
+                with open(path, encoding='utf-8') as f:
+                    cur.execute(f.read())
+                cur.execute('INSERT INTO schema_migrations (version, name) VALUES (%s, %s)', (version, name))
+                conn.commit()
+                applied_now.append(version)
+        finally:
+            # a failed migration leaves the transaction aborted, which would also fail the unlock
+            conn.rollback()
+            cur.execute('SELECT pg_advisory_unlock(%s)', (MIGRATION_LOCK_ID,))
+    return applied_now
+
+
+def _plan_indexes(node, found):
+    if 'Index Name' in node:
+        found.add(node['Index Name'])
+    for child in node.get('Plans', []):
+        _plan_indexes(child, found)
+    return found
+
+
+def plan_indexes(cur, sql, params=(), allow_seqscan=False):
+    """Names of the indexes in PostgreSQL's plan for `sql`.
+
+    On a small table a sequential scan is often cheapest, so by default the plan is made
+    with sequential scans disabled: that shows whether the query *can* use an index.
+    The setting only lasts until the end of the cursor's transaction.
+    """
+    if not allow_seqscan:
+        cur.execute('SET LOCAL enable_seqscan = off')
+    cur.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+    plan = cur.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return _plan_indexes(plan[0]['Plan'], set())
@@ -0,0 +1,20 @@
+-- The original schema; IF NOT EXISTS so databases created before migrations adopt it as-is.
+CREATE TABLE IF NOT EXISTS videos (
+    id SERIAL PRIMARY KEY,
+    title VARCHAR NOT NULL,
+    link VARCHAR NOT NULL,
+    channel VARCHAR,
+    thumbnail VARCHAR,
+    subtitles TEXT,
+    summary TEXT,
+    blurb TEXT,
+    themes TEXT,
+    progress INT,
+    category VARCHAR,
+    video_created TIMESTAMP,
+    video_length INTERVAL,
+    record_created TIMESTAMP NOT NULL DEFAULT NOW(),
+    hidden BOOLEAN NOT NULL DEFAULT FALSE
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS video_link ON videos (link);
@@ -0,0 +1,28 @@
+-- Indexes for the queries the app actually runs.  All of them skip hidden videos, and the
+-- work queues only cover rows still waiting for that step, so they stay small as the
+-- table grows and let each query read its rows in id order without touching the
+-- large TEXT columns of everything else.
+
+-- home page, one category: WHERE NOT hidden AND category = ? ORDER BY id DESC
+CREATE INDEX IF NOT EXISTS videos_visible_category_id ON videos (category, id DESC) WHERE NOT hidden;
+
+-- home page, all categories: WHERE NOT hidden ORDER BY id DESC
+CREATE INDEX IF NOT EXISTS videos_visible_id ON videos (id DESC) WHERE NOT hidden;
+
+-- /?action=subs
+CREATE INDEX IF NOT EXISTS videos_need_subtitles ON videos (id DESC)
+    WHERE NOT hidden AND subtitles IS NULL;
+
+-- /?action=summarize
+CREATE INDEX IF NOT EXISTS videos_need_summary ON videos (id DESC)
+    WHERE NOT hidden AND subtitles IS NOT NULL AND summary IS NULL;
+
+-- /?action=themes
+CREATE INDEX IF NOT EXISTS videos_need_themes ON videos (id DESC)
+    WHERE NOT hidden AND themes IS NULL;
+
+-- /?action=recategorize
+CREATE INDEX IF NOT EXISTS videos_need_category ON videos (id DESC)
+    WHERE NOT hidden AND (category IS NULL OR category ILIKE 'Uncategorized');
+
+ANALYZE videos;
@@ -0,0 +1,20 @@
+-- Background work per video, processed by `python -m youtuber worker` (see jobs.py).
+CREATE TABLE IF NOT EXISTS jobs (
+    id BIGSERIAL PRIMARY KEY,
+    kind VARCHAR NOT NULL,
+    video_id INT NOT NULL REFERENCES videos (id) ON DELETE CASCADE,
+    state VARCHAR NOT NULL DEFAULT 'queued' CHECK (state IN ('queued', 'running', 'done', 'dead')),
+    attempts INT NOT NULL DEFAULT 0,
+    run_after TIMESTAMP NOT NULL DEFAULT NOW(),
+    locked_by VARCHAR,
+    locked_until TIMESTAMP,
+    last_error TEXT,
+    created TIMESTAMP NOT NULL DEFAULT NOW(),
+    updated TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+-- at most one pending job per video and kind; enqueueing again is a no-op
+CREATE UNIQUE INDEX IF NOT EXISTS jobs_pending ON jobs (kind, video_id) WHERE state IN ('queued', 'running');
+
+-- what workers claim from: ready jobs and leases that ran out
+CREATE INDEX IF NOT EXISTS jobs_claimable ON jobs (id) WHERE state IN ('queued', 'running');
@@ -0,0 +1,3 @@
+-- The raw timed captions (pytubefix json_captions) as zlib-compressed JSON, see captions.py,
+-- so the subtitles text can be derived again without refetching.
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS captions BYTEA;
@@ -0,0 +1,15 @@
+-- Full-text search over title, channel, summary and transcript (see store.search_videos).
+-- The tsvector is a stored generated column, so PostgreSQL keeps it current on every insert
+-- and update, and ranking reads it instead of re-parsing multi-KB transcripts per query.
+-- Weights rank title matches above channel, summary and then transcript matches.  Only the
+-- first 300k characters of a transcript are indexed, well under the 1MB tsvector limit.
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS search TSVECTOR GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(channel, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(summary, '')), 'C') ||
+    setweight(to_tsvector('english', left(coalesce(subtitles, ''), 300000)), 'D')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS videos_search ON videos USING GIN (search);
+
+ANALYZE videos;
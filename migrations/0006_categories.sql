@@ -0,0 +1,84 @@
+-- Categories move into their own table.  Videos point at a category by id, so renaming a
+-- category updates one row and merging one into another is a single remap of its videos.
+-- Names are unique regardless of case.  video_count and visible_count (not hidden) are
+-- kept current by the triggers below, so listing categories never scans the videos.
+CREATE TABLE IF NOT EXISTS categories (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR NOT NULL,
+    video_count INT NOT NULL DEFAULT 0,
+    visible_count INT NOT NULL DEFAULT 0
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS categories_name ON categories (lower(name));
+
+-- one row per spelling-insensitive category, keeping the first spelling in sort order
+INSERT INTO categories (name)
+SELECT DISTINCT ON (lower(trim(category))) trim(category) FROM videos
+WHERE trim(category) <> ''
+ORDER BY lower(trim(category)), trim(category)
+ON CONFLICT DO NOTHING;
+
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS category_id INT REFERENCES categories (id);
+
+UPDATE videos SET category_id = categories.id
+FROM categories
+WHERE lower(trim(videos.category)) = lower(categories.name);
+
+-- also drops the indexes on the old column (videos_visible_category_id, videos_need_category)
+ALTER TABLE videos DROP COLUMN IF EXISTS category;
+
+-- home page, one category: WHERE NOT hidden AND category_id = ? ORDER BY id DESC;
+-- also finds the videos needing a category (category_id IS NULL or Uncategorized)
+CREATE INDEX IF NOT EXISTS videos_visible_category_id ON videos (category_id, id DESC) WHERE NOT hidden;
+
+-- merging a category and the foreign key check when deleting one also need the hidden videos
+CREATE INDEX IF NOT EXISTS videos_category_id ON videos (category_id);
+
+UPDATE categories SET video_count = counts.videos, visible_count = counts.visible
+FROM (SELECT category_id, count(*) AS videos, count(*) FILTER (WHERE NOT hidden) AS visible
+      FROM videos WHERE category_id IS NOT NULL GROUP BY category_id) AS counts
+WHERE categories.id = counts.category_id;
+
+-- Statement-level, so a merge moving thousands of videos adjusts each count once.  Updates
+-- that don't change category_id or hidden (summaries, subtitles...) produce no changes.
+CREATE OR REPLACE FUNCTION videos_category_counts() RETURNS TRIGGER LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE categories SET video_count = video_count + delta.videos, visible_count = visible_count + delta.visible
+        FROM (SELECT category_id, count(*) AS videos, count(*) FILTER (WHERE NOT hidden) AS visible
+              FROM new_rows WHERE category_id IS NOT NULL GROUP BY category_id) AS delta
+        WHERE categories.id = delta.category_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE categories SET video_count = video_count - delta.videos, visible_count = visible_count - delta.visible
+        FROM (SELECT category_id, count(*) AS videos, count(*) FILTER (WHERE NOT hidden) AS visible
+              FROM old_rows WHERE category_id IS NOT NULL GROUP BY category_id) AS delta
+        WHERE categories.id = delta.category_id;
+    ELSE
+        UPDATE categories SET video_count = video_count + delta.videos, visible_count = visible_count + delta.visible
+        FROM (SELECT category_id, sum(videos) AS videos, sum(visible) AS visible
+              FROM (SELECT category_id, -1 AS videos, -(NOT hidden)::INT AS visible FROM old_rows
+                    UNION ALL
+                    SELECT category_id, 1, (NOT hidden)::INT FROM new_rows) AS changes
+              WHERE category_id IS NOT NULL
+              GROUP BY category_id
+              HAVING sum(videos) <> 0 OR sum(visible) <> 0) AS delta
+        WHERE categories.id = delta.category_id;
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS videos_category_counts_insert ON videos;
+CREATE TRIGGER videos_category_counts_insert AFTER INSERT ON videos
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION videos_category_counts();
+
+DROP TRIGGER IF EXISTS videos_category_counts_update ON videos;
+CREATE TRIGGER videos_category_counts_update AFTER UPDATE ON videos
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION videos_category_counts();
+
+DROP TRIGGER IF EXISTS videos_category_counts_delete ON videos;
+CREATE TRIGGER videos_category_counts_delete AFTER DELETE ON videos
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION videos_category_counts();
+
+ANALYZE videos;
+ANALYZE categories;
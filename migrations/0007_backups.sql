@@ -0,0 +1,11 @@
+-- One row per backup run made by backup.py, successful or not.
+CREATE TABLE IF NOT EXISTS backups (
+    id SERIAL PRIMARY KEY,
+    format VARCHAR NOT NULL,
+    started TIMESTAMP NOT NULL,
+    finished TIMESTAMP NOT NULL,
+    file VARCHAR,
+    bytes BIGINT,
+    seconds REAL,
+    error TEXT
+);
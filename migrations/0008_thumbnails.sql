@@ -0,0 +1,3 @@
+-- The downloaded, shrunk copy of each thumbnail: its file name in THUMBNAIL_DIR (see thumbnails.py).
+-- NULL until it is downloaded; `thumbnail` keeps the original URL as the fallback.
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS thumbnail_file VARCHAR;
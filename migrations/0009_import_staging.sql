@@ -0,0 +1,32 @@
+-- The parsed home feed, written before any video is processed so a crashed or interrupted import can be
+-- resumed without scraping again (see importer.py).  Each stage stores its output and sets its *_done flag
+-- as it finishes a video, so a resumed import skips the captions and LLM calls it already paid for.  The
+-- run that inserts a video into `videos` deletes its row here in the same transaction.
+--
+-- An import run claims rows by setting locked_by and leasing them until locked_until (with FOR UPDATE
+-- SKIP LOCKED, like the jobs table); a heartbeat thread in importer.import_videos renews the run's leases
+-- while it works.  Overlapping runs never process the same video; the rows of a run that died become
+-- claimable when its lease runs out.
+CREATE TABLE IF NOT EXISTS import_staging (
+    link VARCHAR PRIMARY KEY,
+    title VARCHAR,
+    channel VARCHAR,
+    thumbnail VARCHAR,
+    progress INT,
+    video_created TIMESTAMP,
+    video_length INTERVAL,
+    thumbnail_file VARCHAR,
+    captions BYTEA,
+    subtitles TEXT,
+    summary TEXT,
+    category VARCHAR,
+    thumbnail_done BOOLEAN NOT NULL DEFAULT FALSE,
+    captions_done BOOLEAN NOT NULL DEFAULT FALSE,
+    summary_done BOOLEAN NOT NULL DEFAULT FALSE,
+    category_done BOOLEAN NOT NULL DEFAULT FALSE,
+    locked_by VARCHAR,
+    locked_until TIMESTAMP,
+    last_error TEXT,
+    staged TIMESTAMP NOT NULL DEFAULT NOW(),
+    updated TIMESTAMP NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,14 @@
+-- Channels polled through their Atom feeds (see feeds.py), with what the next poll needs: the ETag and
+-- Last-Modified of the last response for a conditional request, and the newest upload seen so far.
+-- `handle` remembers which configured @handle resolved to the channel, so it is only looked up once.
+CREATE TABLE IF NOT EXISTS feed_channels (
+    channel_id VARCHAR PRIMARY KEY,
+    handle VARCHAR UNIQUE,
+    name VARCHAR,
+    etag VARCHAR,
+    last_modified VARCHAR,
+    last_published TIMESTAMPTZ,
+    last_polled TIMESTAMP,
+    last_status INT,
+    last_error TEXT
+);
@@ -0,0 +1,19 @@
+-- The statement-level update trigger from 0006 fired on every UPDATE of videos (summaries,
+-- subtitles, captions, thumbnails) and built OLD/NEW transition tables of those large rows
+-- each time.  PostgreSQL doesn't allow transition tables on a trigger with a column list,
+-- so updates are counted per row instead, and only when category_id or hidden changes.
+CREATE OR REPLACE FUNCTION videos_category_counts_row() RETURNS TRIGGER LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE categories SET video_count = video_count - 1, visible_count = visible_count - (NOT OLD.hidden)::INT
+    WHERE id = OLD.category_id;
+    UPDATE categories SET video_count = video_count + 1, visible_count = visible_count + (NOT NEW.hidden)::INT
+    WHERE id = NEW.category_id;
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS videos_category_counts_update ON videos;
+CREATE TRIGGER videos_category_counts_update AFTER UPDATE OF category_id, hidden ON videos
+    FOR EACH ROW
+    WHEN (OLD.category_id IS DISTINCT FROM NEW.category_id OR OLD.hidden IS DISTINCT FROM NEW.hidden)
+    EXECUTE FUNCTION videos_category_counts_row();
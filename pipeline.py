@@ -0,0 +1,137 @@
+import queue
+import threading
+
+# Marks the end of the work stream on a stage's input queue.
+_DONE = object()
+
+
+class Stage:
+    """One step of a Pipeline: `func` is called on every item by `workers` threads.
+
+    `func` returns the item to hand to the next stage, or None to drop it (e.g. an
+    already imported video).  Exceptions drop the item and are reported as 'error' events.
+
+    With `batch_size` set, `func` is instead called with a list of up to that many items
+    and returns a list of the same length holding, for each item, its output, None or
+    the Exception it failed with.  A partial batch is flushed once no new item has
+    arrived for `batch_wait` seconds, and at the end of the stream.
+    """
+
+    def __init__(self, name, func, workers=1, batch_size=None, batch_wait=5.0):
+        self.name = name
+        self.func = func
+        self.workers = max(1, int(workers))
+        self.batch_size = max(1, int(batch_size)) if batch_size else None
+        self.batch_wait = batch_wait
+
+
+class Pipeline:
+    """Run items through a chain of Stages using bounded queues between them.
+
+    Every stage has its own worker pool and an input queue of at most `queue_size`
+    items, so a slow stage applies backpressure to the stages before it instead of
+    letting work pile up in memory.  Worker threads never touch Streamlit; progress
+    is delivered as events to the `on_event` callback, which runs on the calling thread.
+    """
+
+    def __init__(self, stages, queue_size=10):
+        self.stages = stages
+        self.queue_size = max(1, int(queue_size))
+
+    def run(self, items, on_event=None):
+        """Push `items` through every stage and return the items that made it out the end.
+
+        `on_event(kind, stage_name, item, error)` is called with kind 'done' when a stage
+        finishes an item, 'dropped' when a stage returns None and 'error' when it raises.
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        events = queue.Queue()
+        results = []
+
+        def feed():
+            for item in items:
+                queues[0].put(item)
+            for _ in range(self.stages[0].workers):
+                queues[0].put(_DONE)
+
+        def emit(stage, outbox, item, output):
+            if isinstance(output, Exception):
+                events.put(('error', stage.name, item, output))
+            elif output is None:
+                events.put(('dropped', stage.name, item, None))
+            else:
+                if outbox is not None:
+                    outbox.put(output)
+                else:
+                    results.append(output)
+                events.put(('done', stage.name, output, None))
+
+        def process(stage, outbox, item):
+            try:
+                output = stage.func(item)
+            except Exception as e:
+                output = e
+            emit(stage, outbox, item, output)
+
+        def process_batch(stage, outbox, batch):
+            try:
+                outputs = stage.func(batch)
+            except Exception as e:
+                outputs = [e] * len(batch)
+            for item, output in zip(batch, outputs):
+                emit(stage, outbox, item, output)
+
+        def work(index, stage, remaining):
+            inbox = queues[index]
+            outbox = queues[index + 1] if index + 1 < len(queues) else None
+            batch = []
+            while True:
+                try:
+                    item = inbox.get(timeout=stage.batch_wait if batch else None)
+                except queue.Empty:
+                    process_batch(stage, outbox, batch)
+                    batch = []
+                    continue
+                if item is _DONE:
+                    break
+                if stage.batch_size is None:
+                    process(stage, outbox, item)
+                    continue
+                batch.append(item)
+                if len(batch) >= stage.batch_size:
+                    process_batch(stage, outbox, batch)
+                    batch = []
+            if batch:
+                process_batch(stage, outbox, batch)
+
+            # the last worker of a stage to finish closes the next stage's queue
+            with remaining['lock']:
+                remaining['count'] -= 1
+                last = remaining['count'] == 0
+            if last:
+                if outbox is not None:
+                    for _ in range(self.stages[index + 1].workers):
+                        outbox.put(_DONE)
+                else:
+                    events.put(None)
+
+        threads = [threading.Thread(target=feed, daemon=True)]
+        for index, stage in enumerate(self.stages):
+            remaining = {'count': stage.workers, 'lock': threading.Lock()}
+            for n in range(stage.workers):
+                threads.append(threading.Thread(target=work, args=(index, stage, remaining),
+                                                name=f'{stage.name}-{n}', daemon=True))
+        for thread in threads:
+            thread.start()
+
+        while True:
+            event = events.get()
+            if event is None:
+                break
+            if on_event:
+                on_event(*event)
+
+        for thread in threads:
+            thread.join()
+        return results
+
@@ -0,0 +1,126 @@
+"""Objects shared by the whole process, created on first use.
+
+Streamlit re-runs the page script on every interaction but imports modules only once, so
+these live as long as the server process (like st.cache_resource did), and the CLI and
+workers get the same objects without importing Streamlit.  Each factory imports its own
+dependencies, so an entry point only pays for what it actually uses.
+"""
+import functools
+import os
+import threading
+
+import config
+
+
+def resource(factory):
+    """Make `factory` run once, on the first call; `.clear()` makes the next call run it again."""
+    lock = threading.Lock()
+    instance = []
+
+    @functools.wraps(factory)
+    def get():
+        if not instance:
+            with lock:
+                if not instance:
+                    instance.append(factory())
+        return instance[0]
+
+    get.clear = instance.clear
+    return get
+
+
+@resource
+def database():
+    # one pool per process; every session and worker thread borrows from it
+    from db import Database
+    from migrations import migrate
+
+    pool = Database(config.POSTGRES_POOL_MIN, config.POSTGRES_POOL_MAX, config.POSTGRES_POOL_CHECK_SECONDS,
+                    dbname=config.POSTGRES_DB, user=config.POSTGRES_USER, password=config.POSTGRES_PASSWORD,
+                    host=config.POSTGRES_HOST)
+    migrate(pool)
+    return pool
+
+
+@resource
+def openai_client():
+    from openai import OpenAI
+
+    # retries are handled by the LLMExecutor so they can respect the shared rate limits
+    return OpenAI(api_key=config.OPENAI_API_KEY, max_retries=0)
+
+
+@resource
+def llm_executor():
+    # one executor per process so every session shares the same rate limits
+    from llm import LLMExecutor
+
+    return LLMExecutor(workers=config.LLM_WORKERS, rpm=config.OPENAI_RPM, tpm=config.OPENAI_TPM,
+                       max_retries=config.LLM_MAX_RETRIES, prices=(config.LLM_PRICE_PROMPT, config.LLM_PRICE_COMPLETION))
+
+
+@resource
+def llm_cache():
+    from llm import ResponseCache
+
+    return ResponseCache(config.LLM_CACHE_DIR, config.LLM_CACHE_TTL_DAYS * 86400,
+                         int(config.LLM_CACHE_MAX_MB * 1024 * 1024))
+
+
+@resource
+def category_registry():
+    # loaded once per process, then kept current as categories are created and renamed
+    from category_registry import CategoryRegistry
+
+    registry = CategoryRegistry()
+    with database().cursor() as cur:
+        registry.seed(cur, config.CATEGORIES)
+        registry.load(cur)
+    return registry
+
+
+@resource
+def classifier():
+    # cleared after retraining so the next run picks up the new model
+    if not os.path.exists(config.CLASSIFIER_PATH):
+        return None
+    from classifier import CategoryClassifier
+
+    try:
+        return CategoryClassifier.load(config.CLASSIFIER_PATH, config.CLASSIFIER_MIN_SCORE, config.CLASSIFIER_MIN_MARGIN)
+    except ValueError as e:
+        # e.g. a model saved by an older version, whose category names needed pickle
+        print(f'ignoring {config.CLASSIFIER_PATH} ({e}); retrain the classifier')
+        return None
+
+
+@resource
+def caption_fetcher():
+    # shared so the per-host limits hold across the import pipeline and every worker thread
+    from captions import CaptionFetcher, FixtureCaptionSource, YouTubeCaptionSource
+
+    source = FixtureCaptionSource(config.CAPTION_FIXTURES_DIR) if config.CAPTION_FIXTURES_DIR else YouTubeCaptionSource()
+    return CaptionFetcher(source, config.CAPTION_WORKERS, config.CAPTION_HOST_CONCURRENCY, config.CAPTION_HOST_INTERVAL)
+
+
+@resource
+def thumbnail_store():
+    from thumbnails import ThumbnailStore
+
+    return ThumbnailStore(config.THUMBNAIL_DIR, config.THUMBNAIL_WIDTH, config.THUMBNAIL_FORMAT, config.THUMBNAIL_QUALITY,
+                          int(config.THUMBNAIL_CACHE_MB * 1024 * 1024), config.THUMBNAIL_WORKERS,
+                          source_url=config.THUMBNAIL_SOURCE_URL)
+
+
+@resource
+def backup_scheduler():
+    from backup import BackupScheduler
+
+    return BackupScheduler(config.BACKUP_DIR, config.BACKUP_FORMAT, config.BACKUP_JOBS, config.BACKUP_KEEP)
+
+
+@resource
+def job_queue():
+    from jobs import JobQueue
+
+    return JobQueue(database(), config.JOB_VISIBILITY_TIMEOUT, config.JOB_MAX_ATTEMPTS, config.JOB_RETRY_DELAY)
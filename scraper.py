@@ -0,0 +1,257 @@
+import json
+import re
+
+
+# Runs inside the browser and returns the same raw records as extract_records_from_html,
+# as one JSON string, so the (often tens of MB) page never has to be serialized.
+EXTRACT_VIDEOS_SCRIPT = r"""
+const text = (el) => el ? el.textContent.trim() : null;
+const hasText = (root, value) => {
+    const walker = document.createTreeWalker(root, NodeFilter.SHOW_TEXT);
+    while (walker.nextNode()) {
+        if (walker.currentNode.nodeValue.trim() === value) return true;
+    }
+    return false;
+};
+const records = [];
+for (const video of document.querySelectorAll('ytd-rich-item-renderer')) {
+    if (video.querySelector('ytd-ad-slot-renderer')) continue;
+    if (video.querySelector('.ytCollectionsStackCollectionStack2')) continue;
+    if (hasText(video, 'Sponsored')) continue;
+
+    const link = video.querySelector('a.yt-lockup-metadata-view-model__title')
+        || video.querySelector('a.yt-lockup-view-model__content-image')
+        || video.querySelector('a#thumbnail');
+    const heading = video.querySelector('h3.yt-lockup-metadata-view-model__heading-reset');
+    const thumbnail = video.querySelector('.ytThumbnailViewModelImage img');
+    const progress = video.querySelector('.ytThumbnailOverlayProgressBarHostWatchedProgressBarSegment');
+    const rows = video.querySelectorAll('.yt-content-metadata-view-model__metadata-row');
+    records.push({
+        link: link ? link.getAttribute('href') : null,
+        title: heading ? (heading.getAttribute('title') || text(heading)) : null,
+        channel: text(video.querySelector('.yt-content-metadata-view-model__metadata-row a')),
+        thumbnail: thumbnail ? thumbnail.getAttribute('src') : null,
+        badge: text(video.querySelector('yt-thumbnail-badge-view-model .yt-badge-shape__text')),
+        progress_width: progress ? progress.style.width : null,
+        metadata: rows.length >= 2
+            ? Array.from(rows[1].querySelectorAll('span.yt-content-metadata-view-model__metadata-text'), text)
+            : [],
+    });
+}
+return JSON.stringify(records);
+"""
+
+
+# Resolves with the number of feed items once there are more than arguments[0] of them,
+# or after arguments[1] milliseconds, whichever comes first.
+WAIT_FOR_MORE_ITEMS_SCRIPT = r"""
+const [count, timeoutMs, done] = [arguments[0], arguments[1], arguments[arguments.length - 1]];
+const items = document.getElementsByTagName('ytd-rich-item-renderer');
+if (items.length > count) { done(items.length); return; }
+let timer = null;
+const observer = new MutationObserver(() => {
+    if (items.length > count) { observer.disconnect(); clearTimeout(timer); done(items.length); }
+});
+observer.observe(document.body, {childList: true, subtree: true});
+timer = setTimeout(() => { observer.disconnect(); done(items.length); }, timeoutMs);
+"""
+
+# The link of every feed item from index arguments[0] on (null for items without one, e.g. ads).
+ITEM_LINKS_SCRIPT = r"""
+const items = Array.from(document.getElementsByTagName('ytd-rich-item-renderer')).slice(arguments[0]);
+return items.map((video) => {
+    const link = video.querySelector('a.yt-lockup-metadata-view-model__title')
+        || video.querySelector('a.yt-lockup-view-model__content-image')
+        || video.querySelector('a#thumbnail');
+    return link ? link.getAttribute('href') : null;
+});
+"""
+
+
+def normalize_link(link):
+    """Absolute watch URL without the extra query parameters YouTube appends, or None."""
+    if link and not link.startswith('http'):
+        link = 'https://www.youtube.com' + link
+    return link.split('&')[0] if link else None
+
+
+def thumbnail_from_link(link):
+    """The hqdefault thumbnail URL for a watch link, or None if the link has no video ID."""
+    video_id_match = re.search(r'[?&]v=([^&]+)', link or '')
+    if video_id_match:
+        return f'https://i.ytimg.com/vi/{video_id_match.group(1)}/hqdefault.jpg'
+    return None
+
+
+def wait_for_more_items(driver, count, timeout):
+    """Block until the feed has more than `count` items or `timeout` seconds pass; returns the item count."""
+    driver.set_script_timeout(timeout + 5)
+    return driver.execute_async_script(WAIT_FOR_MORE_ITEMS_SCRIPT, count, int(timeout * 1000))
+
+
+def scroll_feed(driver, known_links, stop_after_known=20, timeout=10, on_progress=None):
+    """Scroll the home feed until it stops growing or enough consecutive videos are already imported.
+
+    Instead of sleeping a fixed time per scroll, each step waits for new items to appear
+    (or `timeout` seconds).  `known_links(links)` returns the subset of links already in the
+    database; once `stop_after_known` videos in a row are known (0 disables this) the rest of
+    the feed is assumed to be imported too.  Returns the links seen, in feed order.
+    """
+    links = []
+    consecutive_known = 0
+    count = wait_for_more_items(driver, 0, timeout)
+    while True:
+        new_links = [normalize_link(link) for link in driver.execute_script(ITEM_LINKS_SCRIPT, len(links))]
+        links.extend(new_links)
+        known = known_links([link for link in new_links if link])
+        for link in new_links:
+            if link:
+                consecutive_known = consecutive_known + 1 if link in known else 0
+
+        if on_progress:
+            on_progress(len(links), consecutive_known)
+        if stop_after_known and consecutive_known >= stop_after_known:
+            break
+
+        driver.execute_script("window.scrollTo(0, document.documentElement.scrollHeight);")
+        new_count = wait_for_more_items(driver, count, timeout)
+        if new_count <= count:
+            break
+        count = new_count
+
+    return links
+
+
+def extract_records_from_browser(driver):
+    """Run EXTRACT_VIDEOS_SCRIPT in the browser and return its raw video records."""
+    return json.loads(driver.execute_script(EXTRACT_VIDEOS_SCRIPT))
+
+
+def extract_records_from_html(html_content):
+    """Pull the raw video records out of saved YouTube home page HTML using BeautifulSoup.
+
+    This is the fallback when the in-browser extraction fails, and the way to debug a
+    page saved with SAVE_HOME_PAGE_HTML.
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html_content, 'lxml')
+    records = []
+
+    for video in soup.find_all('ytd-rich-item-renderer'):
+        # Skip ads
+        if video.find('ytd-ad-slot-renderer'):
+            continue
+
+        # Skip sponsored content
+        if video.find(string='Sponsored'):
+            continue
+
+        # Skip collections/stacks
+        if video.find(class_='ytCollectionsStackCollectionStack2'):
+            continue
+
+        # Link - try the title link first, then content-image link
+        link_elem = video.select_one('a.yt-lockup-metadata-view-model__title')
+        if not link_elem:
+            link_elem = video.select_one('a.yt-lockup-view-model__content-image')
+        if not link_elem:
+            link_elem = video.select_one('a#thumbnail')
+
+        title_elem = video.select_one('h3.yt-lockup-metadata-view-model__heading-reset')
+        channel_elem = video.select_one('.yt-content-metadata-view-model__metadata-row a')
+        thumb_elem = video.select_one('.ytThumbnailViewModelImage img')
+        length_elem = video.select_one('yt-thumbnail-badge-view-model .yt-badge-shape__text')
+
+        progress_width = None
+        progress_elem = video.select_one('.ytThumbnailOverlayProgressBarHostWatchedProgressBarSegment')
+        if progress_elem:
+            # Extract percentage from "width: 61%;"
+            match = re.search(r'width:\s*(\d+%)', progress_elem.get('style', ''))
+            progress_width = match.group(1) if match else ''
+
+        metadata = []
+        metadata_rows = video.select('.yt-content-metadata-view-model__metadata-row')
+        if len(metadata_rows) >= 2:
+            metadata = [span.get_text(strip=True)
+                        for span in metadata_rows[1].select('span.yt-content-metadata-view-model__metadata-text')]
+
+        records.append({
+            'link': link_elem.get('href', '') if link_elem else None,
+            'title': (title_elem.get('title') or title_elem.get_text(strip=True)) if title_elem else None,
+            'channel': channel_elem.get_text(strip=True) if channel_elem else None,
+            'thumbnail': thumb_elem.get('src') if thumb_elem else None,
+            'badge': length_elem.get_text(strip=True) if length_elem else None,
+            'progress_width': progress_width,
+            'metadata': metadata,
+        })
+
+    return records
+
+
+def parse_videos_from_records(records):
+    """Turn raw video records into video dicts.
+
+    Returns a list of dicts with video info: link, title, channel, thumbnail, progress, video_length, created
+    """
+    # dateparser takes most of a second to import; only importing pays for it
+    import dateparser
+
+    videos = []
+
+    for record in records:
+        video_data = {}
+
+        video_data['link'] = normalize_link(record.get('link'))
+
+        if not video_data['link']:
+            continue  # Skip if no link found
+
+        # Title
+        if not record.get('title'):
+            continue  # Skip if no title
+        video_data['title'] = record['title']
+
+        # Channel
+        video_data['channel'] = record.get('channel')
+
+        # Thumbnail
+        thumbnail = record.get('thumbnail')
+
+        # Fallback: construct thumbnail URL from video ID if lazy-loading didn't populate it
+        if not thumbnail:
+            thumbnail = thumbnail_from_link(video_data['link'])
+
+        video_data['thumbnail'] = thumbnail
+
+        # Video length
+        length_text = record.get('badge')
+        # Skip upcoming/live streams
+        if not length_text or length_text.upper() in ('UPCOMING', 'LIVE'):
+            video_data['video_length'] = None
+        else:
+            video_data['video_length'] = length_text
+
+        # Progress (for partially watched videos)
+        match = re.match(r'\s*(\d+)', record.get('progress_width') or '')
+        video_data['progress'] = int(match.group(1)) if match else 0
+
+        # Created date from the metadata row
+        video_data['created'] = None
+        for text in record.get('metadata') or []:
+            # Look for time-based text (e.g., "2 hours ago", "1 month ago")
+            if text and ('ago' in text or 'hour' in text or 'day' in text or 'week' in text or 'month' in text or 'year' in text):
+                video_data['created'] = dateparser.parse(text)
+                break
+
+        videos.append(video_data)
+
+    return videos
+
+
+def parse_videos_from_html(html_content):
+    """Parse video items from YouTube home page HTML using BeautifulSoup.
+
+    Returns a list of dicts with video info: link, title, channel, thumbnail, progress, video_length, created
+    """
+    return parse_videos_from_records(extract_records_from_html(html_content))
@@ -0,0 +1,572 @@
+"""Queries and updates on the videos table."""
+import html
+import re
+
+from psycopg2.extras import execute_values
+
+import config
+import metrics
+from migrations import plan_indexes
+from resources import category_registry, database
+
+
+# a video's category name, looked up by primary key for just the rows being returned
+CATEGORY_NAME = '(SELECT name FROM categories WHERE categories.id = videos.category_id) AS category'
+
+# the columns the video list renders; transcripts and summaries are loaded on demand
+VIDEO_LIST_COLUMNS = ('id, title, link, channel, thumbnail, thumbnail_file, ' + CATEGORY_NAME + ', progress, video_created, '
+                      'video_length, hidden, subtitles IS NOT NULL AS has_subtitles')
+
+
+def video_page_query(category_id, before_id, limit):
+    """`category_id` None lists every category."""
+    where = ''
+    params = []
+    if category_id is not None:
+        where += ' AND category_id = %s'
+        params.append(category_id)
+    if before_id is not None:
+        where += ' AND id < %s'
+        params.append(before_id)
+    return (f'SELECT {VIDEO_LIST_COLUMNS} FROM videos WHERE HIDDEN = FALSE {where} ORDER BY id DESC LIMIT %s',
+            params + [limit])
+
+
+@metrics.timed('video_page_seconds')
+def get_video_page(category, before_id=None, limit=config.HOMEPAGE_PAGE_SIZE):
+    """One page of visible videos, newest first, starting below `before_id` (keyset pagination).
+
+    Fetches one extra row to tell whether there is another page; returns (videos, has_more).
+    """
+    with database().cursor(dict_rows=True) as cur:
+        cur.execute(*video_page_query(find_category_id(category), before_id, limit + 1))
+        video_list = cur.fetchall()
+    return video_list[:limit], len(video_list) > limit
+
+
+# ts_headline marks matches with these; the text is HTML-escaped before they become <mark> tags
+_MATCH_START, _MATCH_STOP = '\x02', '\x03'
+_HEADLINE_OPTIONS = f'StartSel={_MATCH_START}, StopSel={_MATCH_STOP}'
+
+SEARCH_CONFIG = 'english'
+
+
+def video_search_query(search, category_id, offset, limit):
+    """Visible videos matching the websearch-style `search` (quotes, OR, -word), best match first.
+
+    Matches come from the GIN index on `search` and are ranked from the stored tsvector;
+    the highlighted title and snippet are only computed for the rows on the page.  The
+    snippet comes from the summary and the first 4000 characters of the transcript, since
+    ts_headline re-parses its whole input for every row.
+    """
+    where = ''
+    params = [SEARCH_CONFIG, search]
+    if category_id is not None:
+        where += ' AND category_id = %s'
+        params.append(category_id)
+    sql = f"""SELECT {VIDEO_LIST_COLUMNS}, rank,
+                     ts_headline(%s, title, query, 'HighlightAll=true, {_HEADLINE_OPTIONS}') AS title_html,
+                     ts_headline(%s, coalesce(summary, '') || ' ' || left(coalesce(subtitles, ''), 4000), query,
+                                 'MaxFragments=2, MaxWords=25, MinWords=10, {_HEADLINE_OPTIONS}') AS snippet_html
+              FROM (SELECT id, query, ts_rank_cd(search, query) AS rank
+                    FROM videos, websearch_to_tsquery(%s, %s) AS query
+                    WHERE search @@ query AND HIDDEN = FALSE {where}
+                    ORDER BY rank DESC, id DESC
+                    OFFSET %s LIMIT %s) AS page
+              JOIN videos USING (id)
+              ORDER BY rank DESC, id DESC"""
+    return sql, [SEARCH_CONFIG, SEARCH_CONFIG] + params + [offset, limit]
+
+
+def _highlight(text):
+    return html.escape(text or '').replace(_MATCH_START, '<mark>').replace(_MATCH_STOP, '</mark>')
+
+
+@metrics.timed('search_seconds')
+def search_videos(search, category, offset=0, limit=config.HOMEPAGE_PAGE_SIZE):
+    """One page of search results; returns (videos, has_more) like get_video_page.
+
+    Each video has `title_html` and `snippet_html`: escaped HTML with the matches in <mark>.
+    """
+    with database().cursor(dict_rows=True) as cur:
+        cur.execute(*video_search_query(search, find_category_id(category), offset, limit + 1))
+        video_list = cur.fetchall()
+    for video in video_list:
+        video['title_html'] = _highlight(video['title_html'])
+        video['snippet_html'] = _highlight(video['snippet_html'])
+    return video_list[:limit], len(video_list) > limit
+
+
+def get_video_text(video_id, column):
+    """Load one of the large text columns of a single video."""
+    if column not in ('subtitles', 'summary', 'blurb', 'themes'):
+        raise ValueError(f'not a text column: {column}')
+    with database().cursor() as cur:
+        cur.execute(f'SELECT {column} FROM videos WHERE id = %s', (video_id,))
+        row = cur.fetchone()
+    return row[0] if row else None
+
+
+def category_counts(include_hidden=False):
+    """(category, video count) pairs for the categories that have videos, sorted by category.
+
+    Reads the counts the categories table keeps, so it costs the same however many videos there are.
+    """
+    count = 'video_count' if include_hidden else 'visible_count'
+    with database().cursor() as cur:
+        cur.execute(f'SELECT name, {count} FROM categories WHERE {count} > 0 ORDER BY name')
+        return cur.fetchall()
+
+
+def find_category_id(name):
+    """The id of an existing category, None for 'All' or no category (no filter), -1 for an unknown name."""
+    # the category selectbox is empty (None) until some category has visible videos
+    if not name or name == 'All':
+        return None
+    category_id = category_registry().id_of(name)
+    if category_id is None:
+        # created by another process since the registry was loaded
+        with database().cursor() as cur:
+            cur.execute('SELECT id, name FROM categories WHERE lower(name) = lower(%s)', (name.strip(),))
+            row = cur.fetchone()
+        if row is None:
+            return -1
+        category_registry().add(*row)
+        category_id = row[0]
+    return category_id
+
+
+_CATEGORY_ID_SQL = """WITH existing AS (SELECT id, name FROM categories WHERE lower(name) = lower(%(name)s)),
+                           created AS (INSERT INTO categories (name) SELECT %(name)s
+                                       WHERE NOT EXISTS (SELECT 1 FROM existing)
+                                       ON CONFLICT DO NOTHING RETURNING id, name)
+                      SELECT id, name FROM existing UNION ALL SELECT id, name FROM created"""
+
+
+def category_id(name):
+    """The id of category `name`, creating the category if it doesn't exist; None for no category.
+
+    Always asks the table, so a category renamed or merged by another process is never
+    written with a stale id.
+    """
+    if not name or not name.strip():
+        return None
+    for _ in range(2):
+        with database().cursor() as cur:
+            cur.execute(_CATEGORY_ID_SQL, {'name': name.strip()})
+            row = cur.fetchone()
+        # None when a concurrent insert of the same name won the race; the second try finds it
+        if row:
+            category_registry().add(*row)
+            return row[0]
+    raise RuntimeError(f'could not create category {name!r}')
+
+
+def set_hidden(video_id, hidden):
+    with database().cursor() as cur:
+        # Select and print the URL from the video record
+        cur.execute('SELECT link FROM videos WHERE id = %s', (video_id,))
+        video_link = cur.fetchone()
+        if video_link:
+            print('Hiding: ' + video_link[0])
+
+            cur.execute('update videos set hidden = %s where id = %s', (hidden, video_id))
+
+
+def update_video(video_id, **columns):
+    """Set the given columns of one video, e.g. update_video(42, summary=summary)."""
+    assignments = ', '.join(f'{column} = %s' for column in columns)
+    with database().cursor() as cur:
+        cur.execute(f'UPDATE videos SET {assignments} WHERE id = %s', (*columns.values(), video_id))
+
+
+def update_categories(changes):
+    """Apply (video, new category) pairs in one statement."""
+    if not changes:
+        return
+    category_ids = {category: category_id(category) for _, category in changes}
+    rows = [(video['id'], category_ids[category]) for video, category in changes]
+    with database().cursor() as cur:
+        execute_values(cur, """UPDATE videos SET category_id = data.category_id
+                               FROM (VALUES %s) AS data (id, category_id) WHERE videos.id = data.id""",
+                       rows, template='(%s, %s::INT)')
+
+
+def rename_category(old, new):
+    """Rename category `old` to `new`, or merge it into `new` if a category of that name exists.
+
+    A rename changes one row of the categories table.  A merge moves the videos in one
+    statement and deletes the old category; the triggers move the counts.
+    """
+    new = new.strip()
+    old_id = find_category_id(old)
+    if old_id in (None, -1) or not new:
+        return
+    with database().cursor() as cur:
+        # keeps new videos from being added to the old category until this commits
+        cur.execute('SELECT id FROM categories WHERE id = %s FOR UPDATE', (old_id,))
+        cur.execute('SELECT id FROM categories WHERE lower(name) = lower(%s)', (new,))
+        row = cur.fetchone()
+        merge_into = row[0] if row and row[0] != old_id else None
+        if merge_into is None:
+            cur.execute('UPDATE categories SET name = %s WHERE id = %s', (new, old_id))
+        else:
+            cur.execute('UPDATE videos SET category_id = %s WHERE category_id = %s', (merge_into, old_id))
+            cur.execute('DELETE FROM categories WHERE id = %s', (old_id,))
+    if merge_into is None:
+        category_registry().rename(old_id, new)
+    else:
+        category_registry().remove(old_id)
+
+
+# Matches PostgreSQL-style duration: M:SS or H:MM:SS (e.g. "5:30", "1:23:45")
+_VALID_VIDEO_LENGTH = re.compile(r'^\d{1,2}:\d{2}(:\d{2})?$')
+
+
+def normalize_video_length_for_interval(value):
+    """Return value if it's a valid interval string (M:SS or H:MM:SS), else '00:00'."""
+    if value is None:
+        return None
+    s = value.strip() if isinstance(value, str) else str(value).strip()
+    if s and _VALID_VIDEO_LENGTH.match(s):
+        return s
+    return '00:00'
+
+
+def known_links(links):
+    """Return the subset of `links` that are already in the database, in one query."""
+    with database().cursor() as cur:
+        cur.execute("SELECT link FROM videos WHERE link = ANY(%s)", (list(set(links)),))
+        return {row[0] for row in cur.fetchall()}
+
+
+def dedupe_videos(videos):
+    """Return the parsed videos whose links are not in the database yet, one per link."""
+    seen = known_links([video_data['link'] for video_data in videos])
+
+    new_videos = []
+    for video_data in videos:
+        if video_data['link'] in seen:
+            continue
+        seen.add(video_data['link'])
+        video_data['video_length'] = normalize_video_length_for_interval(video_data['video_length'])
+        video_data['thumbnail_file'] = None
+        video_data['subtitles'] = None
+        video_data['captions'] = None
+        video_data['summary'] = None
+        video_data['blurb'] = None
+        video_data['themes'] = None
+        video_data['category'] = None
+        new_videos.append(video_data)
+    return new_videos
+
+
+INSERT_VIDEOS_SQL = """INSERT INTO videos (title, link, channel, thumbnail, thumbnail_file, progress, video_created,
+                                           video_length, subtitles, captions, summary, blurb, themes, category_id)
+                       VALUES %s
+                       ON CONFLICT (link) DO NOTHING RETURNING link"""
+
+
+def video_row(video_data, category_ids):
+    return (video_data['title'], video_data['link'], video_data['channel'], video_data['thumbnail'],
+            video_data['thumbnail_file'], video_data['progress'], video_data['created'], video_data['video_length'],
+            video_data['subtitles'], video_data['captions'], video_data['summary'], video_data['blurb'],
+            video_data['themes'], category_ids[video_data['category']])
+
+
+@metrics.timed('insert_videos_seconds')
+def insert_videos(batch, staged_by=None):
+    """Bulk insert videos, skipping links that already exist, with one commit for the batch.
+
+    Returns {link: True} for inserted rows, {link: None} for rows another import got to
+    first, and {link: exception} for rows that failed.  If the bulk statement fails the
+    batch is retried row by row under savepoints so one bad row doesn't lose the rest.
+    With `staged_by`, the import_staging rows of the videos that are now in the table
+    (and still claimed by that run) are deleted in the same transaction.
+    """
+    results = {video_data['link']: None for video_data in batch}
+    # resolved before borrowing the connection for the insert, which would otherwise hold two
+    category_ids = {video_data['category']: category_id(video_data['category']) for video_data in batch}
+    with database().connection() as conn, conn.cursor() as insert_cur:
+        try:
+            rows = execute_values(insert_cur, INSERT_VIDEOS_SQL, [video_row(v, category_ids) for v in batch],
+                                  page_size=len(batch), fetch=True)
+            for row in rows:
+                results[row[0]] = True
+            if staged_by:
+                unstage(insert_cur, list(results), staged_by)
+            conn.commit()
+            return results
+        except Exception as e:
+            conn.rollback()
+            print(f'bulk insert failed, retrying row by row: {e}')
+
+        for video_data in batch:
+            insert_cur.execute('SAVEPOINT insert_video')
+            try:
+                rows = execute_values(insert_cur, INSERT_VIDEOS_SQL, [video_row(video_data, category_ids)], fetch=True)
+                if rows:
+                    results[video_data['link']] = True
+                insert_cur.execute('RELEASE SAVEPOINT insert_video')
+            except Exception as e:
+                insert_cur.execute('ROLLBACK TO SAVEPOINT insert_video')
+                results[video_data['link']] = e
+        if staged_by:
+            unstage(insert_cur, [link for link, result in results.items() if not isinstance(result, Exception)],
+                    staged_by)
+    return results
+
+
+# Import staging: the parsed feed and each stage's output, see migrations/0009_import_staging.sql
+STAGES = ('thumbnail', 'captions', 'summary', 'category')
+
+STAGING_COLUMNS = ('link, title, channel, thumbnail, progress, video_created AS created, video_length, thumbnail_file, '
+                   'captions, subtitles, summary, category, thumbnail_done, captions_done, summary_done, category_done, '
+                   'locked_by')
+
+
+def stage_videos(videos):
+    """Write parsed videos that aren't imported yet to import_staging, once per link.
+
+    Videos already staged by an earlier run keep the progress they made.  Returns
+    (already imported, newly staged) counts.
+    """
+    known = known_links([video_data['link'] for video_data in videos])
+    rows, seen = [], set(known)
+    for video_data in videos:
+        if video_data['link'] in seen:
+            continue
+        seen.add(video_data['link'])
+        rows.append((video_data['link'], video_data['title'], video_data['channel'], video_data['thumbnail'],
+                     video_data['progress'], video_data['created'],
+                     normalize_video_length_for_interval(video_data['video_length'])))
+    if not rows:
+        return len(known), 0
+    with database().cursor() as cur:
+        staged = execute_values(cur, """INSERT INTO import_staging (link, title, channel, thumbnail, progress,
+                                                                  video_created, video_length) VALUES %s
+                                        ON CONFLICT (link) DO NOTHING RETURNING link""", rows, fetch=True)
+    return len(known), len(staged)
+
+
+def claim_staged(run, lease_seconds):
+    """Claim every staged video no other run holds a lease on, oldest first, as video dicts."""
+    with database().cursor(dict_rows=True) as cur:
+        cur.execute(f"""UPDATE import_staging
+                         SET locked_by = %(run)s, locked_until = NOW() + %(lease)s * INTERVAL '1 second'
+                         WHERE link IN (SELECT link FROM import_staging
+                                        WHERE locked_until IS NULL OR locked_until < NOW()
+                                        FOR UPDATE SKIP LOCKED)
+                         RETURNING {STAGING_COLUMNS}, staged""", {'run': run, 'lease': lease_seconds})
+        rows = cur.fetchall()
+    rows.sort(key=lambda row: (row.pop('staged'), row['link']))
+    for row in rows:
+        row['blurb'] = row['themes'] = None
+    return rows
+
+
+def checkpoint_staged(run, link, stage, **columns):
+    """Save a stage's output for a staged video and mark the stage done.
+
+    Returns False if the run no longer holds the video (its lease ran out and another run took it).
+    """
+    if stage not in STAGES:
+        raise ValueError(f'unknown import stage: {stage}')
+    assignments = ''.join(f', {column} = %({column})s' for column in columns)
+    with database().cursor() as cur:
+        cur.execute(f"""UPDATE import_staging
+                         SET {stage}_done = TRUE{assignments}, last_error = NULL, updated = NOW()
+                         WHERE link = %(link)s AND locked_by = %(run)s""",
+                    {**columns, 'link': link, 'run': run})
+        return cur.rowcount == 1
+
+
+def renew_staged(run, lease_seconds):
+    """Extend the run's leases on its staged videos."""
+    with database().cursor() as cur:
+        cur.execute("""UPDATE import_staging SET locked_until = NOW() + %s * INTERVAL '1 second'
+                       WHERE locked_by = %s""", (lease_seconds, run))
+
+
+def fail_staged(run, link, error):
+    with database().cursor() as cur:
+        cur.execute('UPDATE import_staging SET last_error = %s, updated = NOW() WHERE link = %s AND locked_by = %s',
+                    (error, link, run))
+
+
+def release_staged(run):
+    """Give up the run's leases on the videos it didn't finish, so the next run can retry them at once."""
+    with database().cursor() as cur:
+        cur.execute('UPDATE import_staging SET locked_by = NULL, locked_until = NULL WHERE locked_by = %s', (run,))
+        return cur.rowcount
+
+
+def unstage(cur, links, run):
+    cur.execute('DELETE FROM import_staging WHERE link = ANY(%s) AND locked_by = %s', (links, run))
+
+
+def staging_status():
+    """Counts of the staged videos: total, leased by a running import, failed, and done per stage."""
+    with database().cursor(dict_rows=True) as cur:
+        cur.execute("""SELECT count(*) AS staged,
+                              count(*) FILTER (WHERE locked_until >= NOW()) AS running,
+                              count(*) FILTER (WHERE last_error IS NOT NULL) AS failed,
+                              count(*) FILTER (WHERE thumbnail_done) AS thumbnail,
+                              count(*) FILTER (WHERE captions_done) AS captions,
+                              count(*) FILTER (WHERE summary_done) AS summary,
+                              count(*) FILTER (WHERE category_done) AS category
+                       FROM import_staging""")
+        return cur.fetchone()
+
+
+# Work queues: the visible videos still missing one processing step.
+# Each has a matching partial index (see migrations/0002_workload_indexes.sql and 0006_categories.sql).
+NEED_SUBTITLES_WHERE = 'HIDDEN = FALSE AND subtitles IS NULL'
+NEED_SUMMARY_WHERE = 'HIDDEN = FALSE AND subtitles IS NOT NULL AND summary IS NULL'
+NEED_THEMES_WHERE = 'HIDDEN = FALSE AND themes IS NULL'
+NEED_CATEGORY_SQL = (f"SELECT id, title, summary, themes, {CATEGORY_NAME} FROM videos WHERE HIDDEN = FALSE "
+                     "AND (category_id IS NULL OR category_id = ANY(ARRAY(SELECT id FROM categories "
+                     "WHERE lower(name) = 'uncategorized'))) ORDER BY id DESC LIMIT 500")
+
+
+# everything but the raw captions, which only captions.py needs
+VIDEO_COLUMNS = ('id, title, link, channel, thumbnail, thumbnail_file, progress, video_created, video_length, subtitles, '
+                 'summary, blurb, themes, category_id, ' + CATEGORY_NAME + ', record_created, hidden')
+
+
+def load_video(video_id):
+    with database().cursor(dict_rows=True) as cur:
+        cur.execute(f'SELECT {VIDEO_COLUMNS} FROM videos WHERE id = %s', (video_id,))
+        return cur.fetchone()
+
+
+def videos_needing_subtitles(limit=None):
+    """(id, link) of the visible videos without subtitles, newest first."""
+    with database().cursor() as cur:
+        cur.execute(f'SELECT id, link FROM videos WHERE {NEED_SUBTITLES_WHERE} ORDER BY id DESC LIMIT %s', (limit,))
+        return cur.fetchall()
+
+
+def feed_cursors(channel_ids):
+    """The poll cursor of each channel (a row is created for new ones), as dicts for FeedPoller.poll."""
+    with database().cursor(dict_rows=True) as cur:
+        cur.execute('INSERT INTO feed_channels (channel_id) SELECT unnest(%s::VARCHAR[]) ON CONFLICT DO NOTHING',
+                    (list(channel_ids),))
+        cur.execute("""SELECT channel_id, etag, last_modified, last_published FROM feed_channels
+                       WHERE channel_id = ANY(%s)""", (list(channel_ids),))
+        return cur.fetchall()
+
+
+def save_feed_cursors(cursors):
+    """Store the cursors returned by FeedPoller.poll, in one statement."""
+    if not cursors:
+        return
+    rows = [(c['channel_id'], c.get('name'), c.get('etag'), c.get('last_modified'), c.get('last_published'),
+             c.get('status')) for c in cursors]
+    with database().cursor() as cur:
+        execute_values(cur, """UPDATE feed_channels
+                               SET name = coalesce(data.name, feed_channels.name), etag = data.etag,
+                                   last_modified = data.last_modified, last_published = data.last_published,
+                                   last_status = data.status, last_polled = NOW(), last_error = NULL
+                               FROM (VALUES %s) AS data (channel_id, name, etag, last_modified, last_published, status)
+                               WHERE feed_channels.channel_id = data.channel_id""",
+                       rows, template='(%s, %s, %s, %s, %s::TIMESTAMPTZ, %s::INT)')
+
+
+def feed_failed(channel_id, error):
+    with database().cursor() as cur:
+        cur.execute('UPDATE feed_channels SET last_polled = NOW(), last_error = %s WHERE channel_id = %s',
+                    (error, channel_id))
+
+
+def feed_handles(handles):
+    """{handle: channel id} for the handles resolved before."""
+    with database().cursor() as cur:
+        cur.execute('SELECT handle, channel_id FROM feed_channels WHERE handle = ANY(%s)', (list(handles),))
+        return dict(cur.fetchall())
+
+
+def save_feed_handle(handle, channel_id):
+    with database().cursor() as cur:
+        cur.execute("""INSERT INTO feed_channels (channel_id, handle) VALUES (%s, %s)
+                       ON CONFLICT (channel_id) DO UPDATE SET handle = EXCLUDED.handle""", (channel_id, handle))
+
+
+def videos_with_thumbnails(limit=None):
+    """(id, thumbnail URL, thumbnail_file) of every video with a thumbnail, newest first."""
+    with database().cursor() as cur:
+        cur.execute('SELECT id, thumbnail, thumbnail_file FROM videos WHERE thumbnail IS NOT NULL '
+                    'ORDER BY id DESC LIMIT %s', (limit,))
+        return cur.fetchall()
+
+
+def update_thumbnail_files(files):
+    """Set thumbnail_file of many videos in one statement; `files` is [(id, file name), ...]."""
+    with database().cursor() as cur:
+        execute_values(cur, """UPDATE videos SET thumbnail_file = data.file FROM (VALUES %s) AS data (id, file)
+                               WHERE videos.id = data.id""", files)
+
+
+def stored_captions(batch_size=200):
+    """Yield (id, compressed captions) of every video with stored captions, a batch of rows at a time."""
+    last_id = 0
+    while True:
+        with database().cursor() as cur:
+            cur.execute('SELECT id, captions FROM videos WHERE captions IS NOT NULL AND id > %s ORDER BY id LIMIT %s',
+                        (last_id, batch_size))
+            rows = cur.fetchall()
+        if not rows:
+            return
+        yield from rows
+        last_id = rows[-1][0]
+
+
+def update_subtitles(subtitles):
+    """Set the subtitles text of many videos in one statement; `subtitles` is [(id, text), ...]."""
+    with database().cursor() as cur:
+        execute_values(cur, """UPDATE videos SET subtitles = data.subtitles FROM (VALUES %s) AS data (id, subtitles)
+                               WHERE videos.id = data.id""", subtitles)
+
+
+def videos_needing_category():
+    with database().cursor(dict_rows=True) as cur:
+        cur.execute(NEED_CATEGORY_SQL)
+        return cur.fetchall()
+
+
+def load_categorized_videos():
+    with database().cursor(dict_rows=True) as cur:
+        cur.execute("""SELECT videos.id, title, summary, categories.name AS category
+                       FROM videos JOIN categories ON categories.id = videos.category_id
+                       WHERE lower(categories.name) <> 'uncategorized'""")
+        return cur.fetchall()
+
+
+# (description, query, params, index the query should use)
+INDEX_CHECKS = [
+    ('home page, one category', *video_page_query(1, None, config.HOMEPAGE_PAGE_SIZE), 'videos_visible_category_id'),
+    ('home page, one category, older page', *video_page_query(1, 1000, config.HOMEPAGE_PAGE_SIZE), 'videos_visible_category_id'),
+    ('home page, all categories', *video_page_query(None, None, config.HOMEPAGE_PAGE_SIZE), 'videos_visible_id'),
+    ('home page, all categories, older page', *video_page_query(None, 1000, config.HOMEPAGE_PAGE_SIZE), 'videos_visible_id'),
+    ('videos needing subtitles', f'SELECT id FROM videos WHERE {NEED_SUBTITLES_WHERE}', (), 'videos_need_subtitles'),
+    ('videos needing a summary', f'SELECT id FROM videos WHERE {NEED_SUMMARY_WHERE}', (), 'videos_need_summary'),
+    ('videos needing themes', f'SELECT id FROM videos WHERE {NEED_THEMES_WHERE}', (), 'videos_need_themes'),
+    ('videos needing a category', NEED_CATEGORY_SQL, (), 'videos_visible_category_id'),
+    ('videos in a category, for merges', 'SELECT id FROM videos WHERE category_id = %s', (1,), 'videos_category_id'),
+    ('search, all categories', *video_search_query('python asyncio', None, 0, config.HOMEPAGE_PAGE_SIZE), 'videos_search'),
+    ('search, one category', *video_search_query('python asyncio', 1, 0, config.HOMEPAGE_PAGE_SIZE), 'videos_search'),
+    ('known links', 'SELECT link FROM videos WHERE link = ANY(%s)', (['https://www.youtube.com/watch?v=x'],), 'video_link'),
+]
+
+
+def check_indexes():
+    """EXPLAIN every hot query and report whether it uses the index it was given."""
+    rows = []
+    with database().cursor() as cur:
+        for description, sql, params, index in INDEX_CHECKS:
+            used = plan_indexes(cur, sql, params)
+            chosen = plan_indexes(cur, sql, params, allow_seqscan=True)
+            rows.append({'query': description, 'index': index, 'ok': index in used,
+                         'indexes used': ', '.join(sorted(used)) or 'none',
+                         'planner choice now': ', '.join(sorted(chosen)) or 'sequential scan'})
+    return rows
@@ -0,0 +1,269 @@
+"""The prompts and LLM calls behind summaries, themes and blurbs."""
+import re
+from concurrent.futures import Future
+
+import config
+import metrics
+from llm import cache_key, estimate_tokens, get_encoding, group_by_tokens, split_tokens, spread
+from resources import llm_cache, llm_executor, openai_client
+
+
+def strip_preamble(answer):
+    return re.sub(r"^Here( are| is|'s)\s.*?\n\n", '', answer).strip()
+
+
+def submit_prompt(text, prompt, model=config.MODEL, max_tokens=config.MAX_TOKENS, use_cache=True):
+    """Start one completion of prompt + text and return a Future for the answer.
+
+    Cached answers come back as an already finished Future; everything else runs on the
+    LLM executor so several prompts can be in flight at once.
+    """
+    system_prompt = "You are a helpful assistant."
+    temperature = 0.7
+    key = cache_key(model, system_prompt, prompt, text, temperature)
+    cached = llm_cache().get(key, bypass=not use_cache)
+    if cached is not None:
+        future = Future()
+        future.set_result(cached)
+        return future
+
+    def complete():
+        full_prompt = prompt + text
+        response = llm_executor().call(
+            openai_client().chat.completions.create,
+            estimate_tokens(full_prompt) + max_tokens,
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": full_prompt}
+            ],
+            max_tokens=max_tokens,
+            temperature=temperature,
+            n=1,
+            stop=None
+        )
+        answer = response.choices[0].message.content
+        llm_cache().put(key, answer)
+        return answer
+
+    return llm_executor().run(complete)
+
+
+def stream_prompt(text, prompt, model=config.MODEL, max_tokens=config.MAX_TOKENS, use_cache=True):
+    """Like submit_prompt, but yield the answer piece by piece as the model writes it, on this thread.
+
+    The answer is cached once it is complete; a cached answer comes back in one piece.
+    """
+    system_prompt = "You are a helpful assistant."
+    temperature = 0.7
+    key = cache_key(model, system_prompt, prompt, text, temperature)
+    cached = llm_cache().get(key, bypass=not use_cache)
+    if cached is not None:
+        yield cached
+        return
+
+    full_prompt = prompt + text
+    answer = []
+    for delta in llm_executor().stream(
+        openai_client().chat.completions.create,
+        estimate_tokens(full_prompt) + max_tokens,
+        model=model,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": full_prompt}
+        ],
+        max_tokens=max_tokens,
+        temperature=temperature,
+        n=1,
+        stop=None
+    ):
+        answer.append(delta)
+        yield delta
+    llm_cache().put(key, ''.join(answer))
+
+
+def strip_preamble_stream(deltas):
+    """strip_preamble for streamed text: only the first line is held back, and only while it might be a preamble."""
+    deltas = iter(deltas)
+    buffer = ''
+    for delta in deltas:
+        buffer += delta
+        text = buffer.lstrip()
+        if 'Here'.startswith(text):
+            continue
+        if not text.startswith('Here'):
+            break
+        line, _, rest = text.partition('\n')
+        if not rest:
+            continue
+        if re.match(r"Here( are| is|'s)\s", line) and rest.startswith('\n'):
+            buffer = rest
+        break
+    else:
+        yield strip_preamble(buffer)
+        return
+    yield buffer.lstrip()
+    yield from deltas
+
+
+def prompt_each(texts, prompt, model=config.MODEL, max_tokens=config.SUMMARY_OUTPUT_TOKENS, use_cache=True):
+    """Run `prompt` over every text concurrently and return the answers in order."""
+    futures = [submit_prompt(text, prompt, model, max_tokens, use_cache) for text in texts]
+    return [strip_preamble(future.result()) for future in futures]
+
+
+def prompt_all(text, prompt, model=config.MODEL, max_tokens=config.MAX_TOKENS, max_chunks=5, use_cache=True, stream=False):
+    """Run `prompt` over the text a context window at a time and join the answers.
+
+    With stream=True this returns a generator of the answer's text as it is written instead.
+    """
+    # Split the text into chunks of tokens that fit within the model's context window
+    chunks = split_tokens(text, get_encoding(model), max_tokens // 2)[:max_chunks]
+    if stream:
+        return _stream_all(chunks, prompt, model, max_tokens, use_cache)
+    return _prompt_all(chunks, prompt, model, max_tokens, use_cache)
+
+
+@metrics.timed('prompt_all_seconds')
+def _prompt_all(chunks, prompt, model, max_tokens, use_cache):
+    # send every chunk at once; the executor keeps us inside the account's rate limits
+    futures = [submit_prompt(chunk, prompt, model, max_tokens, use_cache) for chunk in chunks]
+
+    output = ""
+    for future in futures:
+        output += future.result() + "\n"
+
+    return strip_preamble(output)
+
+
+def _stream_all(chunks, prompt, model, max_tokens, use_cache):
+    if not chunks:
+        return
+    # the first chunk streams here while the rest run on the executor, to be shown when it's done
+    futures = [submit_prompt(chunk, prompt, model, max_tokens, use_cache) for chunk in chunks[1:]]
+    try:
+        yield from strip_preamble_stream(stream_prompt(chunks[0], prompt, model, max_tokens, use_cache))
+        for future in futures:
+            yield "\n" + strip_preamble(future.result())
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+SUMMARY_PROMPT = "Restate the following youtube video transcript in a few short sentences including whatever information in the transcript is alluded to by the title.  for example if the title says 'somebody said something crazy' or 'you will never believe what trump advisor did' then please include who it refers to and what they said or did and what effect it had.  do not include anything from the text that appears to be a commercial or an advertisement or product recommendation.  note that there may be incorrect words in the computer-generated transcript so do your best to correctly interpret the actual words - sometimes the title can help disambiguate.  there may be multiple speakers with different points of view so please try to separate those out.  !!!!DO NOT INCLUDE PRODUCT PLACEMENTS, COMMERICALS, ADVERTISEMENTS, PRODUCT RECOMMENDATIONS!!!!: "
+SUMMARY_REDUCE_PROMPT = "The following are summaries of consecutive parts of one youtube video transcript.  Combine them into a single summary in a few short sentences, keeping who said or did what and dropping repetition.  do not include anything that appears to be an advertisement or product placement: "
+SUMMARY_COMPRESS_PROMPT = "Restate the following summary of a youtube transcript in a more concise form.  do not include anything that appears to be an advertisement or product placement: "
+
+
+@metrics.timed('summary_seconds')
+def get_summary(text, size=4096, use_cache=True):
+    """Summarize a whole transcript with a map-reduce over token-sized chunks.
+
+    The transcript is split into SUMMARY_CHUNK_TOKENS pieces that overlap by
+    SUMMARY_CHUNK_OVERLAP tokens.  If there are more than SUMMARY_TOKEN_BUDGET allows, chunks
+    are picked evenly across the video instead of only from the start.  All chunks are
+    summarized at once, then the partial summaries are combined a group at a time until a
+    single summary is left, which is condensed once more if it is longer than `size`.
+    """
+    encoding = get_encoding(config.MODEL)
+    chunks = split_tokens(text, encoding, config.SUMMARY_CHUNK_TOKENS, config.SUMMARY_CHUNK_OVERLAP)
+    chunks = spread(chunks, max(1, config.SUMMARY_TOKEN_BUDGET // config.SUMMARY_CHUNK_TOKENS))
+    summaries = prompt_each(chunks, SUMMARY_PROMPT, use_cache=use_cache)
+
+    rounds = 0
+    while len(summaries) > 1 and rounds < 5:
+        groups = group_by_tokens(summaries, encoding, config.SUMMARY_CHUNK_TOKENS)
+        summaries = prompt_each(['\n\n'.join(group) for group in groups], SUMMARY_REDUCE_PROMPT, use_cache=use_cache)
+        rounds += 1
+
+    summary = '\n'.join(summaries)
+    if len(summary) > size:
+        summary = prompt_each([summary], SUMMARY_COMPRESS_PROMPT, use_cache=use_cache)[0]
+
+    return summary
+
+
+def stream_summary(text, size=4096, use_cache=True):
+    """get_summary, yielding the summary as it is written.
+
+    The chunk summaries and all but the last combining round are computed up front as in
+    get_summary; the last completion (or the only one, for a transcript that fits in one
+    chunk) is streamed.  Its output is capped at SUMMARY_OUTPUT_TOKENS, so there is no
+    condensing pass afterwards and `size` is not enforced.
+    """
+    with metrics.timer('summary_seconds', mode='stream'):
+        encoding = get_encoding(config.MODEL)
+        chunks = split_tokens(text, encoding, config.SUMMARY_CHUNK_TOKENS, config.SUMMARY_CHUNK_OVERLAP)
+        chunks = spread(chunks, max(1, config.SUMMARY_TOKEN_BUDGET // config.SUMMARY_CHUNK_TOKENS))
+        if not chunks:
+            return
+        if len(chunks) == 1:
+            last, prompt = chunks[0], SUMMARY_PROMPT
+        else:
+            summaries = prompt_each(chunks, SUMMARY_PROMPT, use_cache=use_cache)
+            groups = group_by_tokens(summaries, encoding, config.SUMMARY_CHUNK_TOKENS)
+            rounds = 0
+            while len(groups) > 1 and rounds < 4:
+                summaries = prompt_each(['\n\n'.join(group) for group in groups], SUMMARY_REDUCE_PROMPT,
+                                        use_cache=use_cache)
+                groups = group_by_tokens(summaries, encoding, config.SUMMARY_CHUNK_TOKENS)
+                rounds += 1
+            if len(groups) == 1:
+                last, prompt = '\n\n'.join(groups[0]), SUMMARY_REDUCE_PROMPT
+            else:
+                last, prompt = '\n'.join(summaries), SUMMARY_COMPRESS_PROMPT
+
+        yield from strip_preamble_stream(stream_prompt(last, prompt, max_tokens=config.SUMMARY_OUTPUT_TOKENS,
+                                                       use_cache=use_cache))
+
+
+def get_themes(text, size=4096):
+    themes = prompt_all(text[0:4096], "Return a brief list of major themes as bullet points: ")
+    retries = 3
+    while (len(themes) > size and retries >= 0):
+        themes = prompt_all(themes, "Return a list of major themes as bullet points without repeating: ")
+        retries -= 1
+
+    return themes
+
+
+def get_blurb(text, size=4096):
+    return prompt_all(text[0:4096], "Turn this into a single short blurb: ")
+
+
+################### OLLAMA ###################
+# def prompt_all(text, prompt, model=MODEL, max_tokens=MAX_TOKENS, max_chunks=5):
+#     texts = splitter.chunks(text)#, chunk_capacity=(MIN_TOKENS, max_tokens))
+#     combined_texts = []
+#     total_tokens = 0
+#     current_text = ""
+
+#     for text in texts:
+#         text_tokens = len(encoding.encode(text))
+
+#         if total_tokens + text_tokens <= MAX_TOKENS:
+#             current_text += text
+#             total_tokens += text_tokens
+#         else:
+#             combined_texts.append(current_text)
+#             current_text = text
+#             total_tokens = text_tokens
+
+#     if current_text:
+#         combined_texts.append(current_text)
+
+#     output = ""
+#     for combined_text in combined_texts[:max_chunks]:
+#         prompt += str(combined_text)
+#         # https://github.com/ollama/ollama/issues/2242
+#         stream = ollama.generate(
+#             model=model,
+#             prompt=prompt,
+#             stream=True
+#         )
+#         response = ''.join(chunk['response'] for chunk in stream).strip()
+#         output += response + "\n"
+
+#     output = re.sub(r"^Here( are| is|'s)\s.*?\n\n", '', output)
+#     return output.strip()
+
@@ -0,0 +1,71 @@
+"""Background job handlers, one per job kind, run by `python -m youtuber worker`.
+
+Each handler imports what it needs when it runs, so the pages that only queue jobs and
+show their status don't load pytubefix or the LLM client.
+"""
+import config
+import store
+from captions import captions_to_text, compress_captions
+from resources import caption_fetcher, job_queue
+
+
+def save_captions(video_id, captions):
+    """Store fetched captions and their text, and queue the summary; False if the video has none."""
+    if captions is None:
+        return False
+    store.update_video(video_id, captions=compress_captions(captions),
+                       subtitles=captions_to_text(captions, config.SUBTITLE_TIMESTAMPS))
+    job_queue().enqueue('summary', [video_id])
+    return True
+
+
+def subtitles_job(video_id):
+    video = store.load_video(video_id)
+    if video is None or video['subtitles']:
+        return
+    save_captions(video_id, caption_fetcher().fetch(video['link']))
+
+
+def summary_job(video_id):
+    from summaries import get_summary
+
+    video = store.load_video(video_id)
+    if video is None or not video['subtitles']:
+        return
+    summary = get_summary(video['subtitles'], config.MAX_TOKENS)
+    blurb = None
+    # blurb = get_blurb(video['subtitles'], 1024)
+    themes = None
+    # themes = get_themes(video['subtitles'], 1024)
+    store.update_video(video_id, summary=summary, blurb=blurb, themes=themes)
+
+
+def themes_job(video_ids):
+    """Themes for each video, then one categorization pass over the whole batch."""
+    from categorize import categorize_videos
+    from summaries import get_themes
+
+    videos = [video for video in map(store.load_video, video_ids) if video is not None]
+    for video in videos:
+        video['blurb'] = None
+        # video['blurb'] = get_blurb(video['title'] + ' - ' + video['subtitles'], 1024)
+        video['themes'] = get_themes(video['title'] + ' - ' + (video['subtitles'] or ''), 1024)
+    for video, category in zip(videos, categorize_videos(videos)):
+        columns = {'themes': video['themes'], 'blurb': video['blurb']}
+        # no answer keeps the category the video already has
+        if category is not None:
+            columns['category_id'] = store.category_id(category)
+        store.update_video(video['id'], **columns)
+
+
+# job kind -> (page title, handler, which videos need it)
+JOB_KINDS = {
+    'subtitles': ('Subtitles', subtitles_job, store.NEED_SUBTITLES_WHERE),
+    'summary': ('Summaries', summary_job, store.NEED_SUMMARY_WHERE),
+    'themes': ('Themes and categories', themes_job, store.NEED_THEMES_WHERE),
+}
+
+# job kinds whose handler takes a list of up to this many video ids, claimed together
+BATCH_SIZES = {
+    'themes': config.CATEGORIZE_BATCH_SIZE,
+}
@@ -0,0 +1,176 @@
+"""Thumbnails downloaded once, shrunk to the width the home page shows, and served from disk.
+
+The home page used to hand every `i.ytimg.com/.../hqdefault.jpg` URL to the browser, so
+each render fetched 50 full-size JPEGs from YouTube.  Now the import pipeline downloads
+each thumbnail, transcodes it to a small WebP (or JPEG) and stores it under the hash of
+its bytes; the video row keeps that file name in `thumbnail_file`.  Identical images
+(e.g. YouTube's placeholder) are stored once.  Pillow is imported only when transcoding.
+"""
+import hashlib
+import io
+import os
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from glob import glob
+from urllib.parse import urlparse
+
+import metrics
+from captions import HostLimiter
+
+FORMATS = {'webp': ('WEBP', '.webp'), 'jpeg': ('JPEG', '.jpg')}
+
+# how long a cached file may go unused before serving it refreshes its mtime (for LRU eviction)
+TOUCH_AFTER_SECONDS = 3600
+
+
+def transcode(data, width, fmt='webp', quality=70):
+    """Scale image bytes down to `width` pixels wide (never up) and encode them as `fmt`."""
+    from PIL import Image, features
+
+    if fmt == 'webp' and not features.check('webp'):
+        fmt = 'jpeg'
+    with Image.open(io.BytesIO(data)) as image:
+        # JPEGs can be decoded at 1/2, 1/4 or 1/8 scale, which is much faster than a full decode
+        image.draft('RGB', (width, width))
+        image = image.convert('RGB')
+        if image.width > width:
+            image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+        out = io.BytesIO()
+        if fmt == 'webp':
+            image.save(out, FORMATS[fmt][0], quality=quality, method=4)
+        else:
+            image.save(out, FORMATS[fmt][0], quality=quality, optimize=True, progressive=True)
+    return out.getvalue(), FORMATS[fmt][1]
+
+
+class ThumbnailStore:
+    """Content-addressed thumbnail files in `directory`, at most `max_bytes` of them.
+
+    Files are named by the SHA-256 of their bytes, two levels deep like the LLM response
+    cache.  When the store grows past `max_bytes` the least recently used files (by mtime,
+    which serving refreshes) are deleted until it is back under 90% of the limit; a video
+    whose file was evicted shows the original URL until `python -m youtuber thumbnails`
+    downloads it again.  `source_url` replaces the scheme and host of every download, to
+    point at a local stand-in for the image host.
+    """
+
+    def __init__(self, directory, width=240, fmt='webp', quality=70, max_bytes=200 * 1024 * 1024,
+                 workers=8, host_concurrency=8, source_url=None, timeout=10):
+        self.directory = directory
+        self.width = width
+        self.fmt = fmt
+        self.quality = quality
+        self.max_bytes = max_bytes
+        self.workers = max(1, int(workers))
+        self.limiter = HostLimiter(host_concurrency, 0)
+        self.source_url = source_url.rstrip('/') if source_url else None
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.size = sum(os.path.getsize(path) for path in self._files())
+
+    def _files(self):
+        # only finished images: a `.tmp` file being written (or left by a crash) isn't part of the store
+        return [path for _, suffix in FORMATS.values() for path in glob(os.path.join(self.directory, '*', '*' + suffix))]
+
+    def download_url(self, url):
+        if not self.source_url:
+            return url
+        parsed = urlparse(url)
+        return self.source_url + parsed.path + (f'?{parsed.query}' if parsed.query else '')
+
+    def download(self, url):
+        url = self.download_url(url)
+        host = urlparse(url).netloc
+        request = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
+        with self.limiter.slot(host), metrics.timer('thumbnail_download_seconds', host=host):
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.read()
+
+    def put(self, data):
+        """Transcode image bytes and store them; returns the file name relative to the store."""
+        with metrics.timer('thumbnail_transcode_seconds'):
+            image, suffix = transcode(data, self.width, self.fmt, self.quality)
+        digest = hashlib.sha256(image).hexdigest()
+        name = os.path.join(digest[:2], digest + suffix)
+        path = os.path.join(self.directory, name)
+        if os.path.exists(path):
+            os.utime(path)
+            return name
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(image)
+        # another worker may have stored the same image meanwhile; then it is already counted
+        existed = os.path.exists(path)
+        os.replace(tmp_path, path)
+        metrics.inc('thumbnail_bytes_total', len(data), kind='downloaded')
+        if existed:
+            return name
+        metrics.inc('thumbnail_bytes_total', len(image), kind='stored')
+        with self.lock:
+            self.size += len(image)
+            over = self.size > self.max_bytes
+        if over:
+            self.evict()
+        return name
+
+    def fetch(self, url):
+        """Download, shrink and store the thumbnail at `url`; returns its file name."""
+        return self.put(self.download(url))
+
+    def fetch_many(self, urls):
+        """Yield (url, file name or None, error or None) as each thumbnail is stored."""
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='thumbnails') as pool:
+            futures = {pool.submit(self.fetch, url): url for url in urls}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, e
+
+    def path(self, name):
+        """The local file for a stored thumbnail, or None if there is none (any more)."""
+        if not name:
+            return None
+        path = os.path.join(self.directory, name)
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return None
+        if time.time() - mtime > TOUCH_AFTER_SECONDS:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        return path
+
+    def _remove(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        with self.lock:
+            self.size -= size
+
+    def evict(self):
+        files = []
+        for path in self._files():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+
+        with self.lock:
+            self.size = sum(size for _, size, _ in files)
+        target = self.max_bytes * 0.9
+        for _, _, path in files:
+            if self.size <= target:
+                break
+            self._remove(path)
+            metrics.inc('thumbnail_evictions_total')
@@ -0,0 +1,442 @@
+"""The Streamlit pages.  Heavy modules (browser, LLM, classifier) are imported by the pages that use them."""
+from datetime import datetime
+
+import streamlit as st
+import timeago
+
+import config
+import metrics
+import store
+from resources import backup_scheduler, classifier, job_queue, llm_cache, thumbnail_store
+from tasks import JOB_KINDS
+
+
+@st.cache_data(ttl=3600)
+def get_category_counts():
+    # cleared whenever videos are imported, hidden or recategorized
+    return store.category_counts()
+
+
+def show_older_videos(last_id):
+    st.session_state['page_cursors'].append(last_id)
+
+
+def show_newer_videos():
+    st.session_state['page_cursors'].pop()
+
+
+def view_homepage():
+    st.title('YouTuber')
+    result = get_category_counts()
+    categories = [row[0] for row in result]
+
+    labels = {}
+    for row in result:
+        labels[row[0]] = f'{row[0]} ({row[1]})'
+    now = datetime.now()
+
+    col1, col2 = st.columns([1, 2])
+    category = col1.selectbox('Category: ', categories, key='category', format_func=lambda x: labels[x])
+    search = col2.text_input('Search: ', key='search', placeholder='words, "a phrase", this OR that, -word').strip()
+
+    # page_cursors holds the id each page starts below, or the offset of each page of search
+    # results; it resets when the category or search changes
+    if st.session_state.get('page_category') != (category, search):
+        st.session_state['page_category'] = (category, search)
+        st.session_state['page_cursors'] = []
+    cursors = st.session_state['page_cursors']
+    if search:
+        offset = cursors[-1] if cursors else 0
+        video_list, has_more = store.search_videos(search, category, offset)
+        next_cursor = offset + len(video_list)
+        if not video_list:
+            st.write(f'No videos match "{search}"')
+    else:
+        video_list, has_more = store.get_video_page(category, cursors[-1] if cursors else None)
+        next_cursor = video_list[-1]['id'] if video_list else None
+
+    col1, col1a, col2, col3, col4, col5, col6 = st.columns([1, 1, 4, 2, 1, 1, 1])
+    col1.write('Thumbnail  \nChannel')
+    col1a.write('Category')
+    col2.write('Title')
+    col3.write('Length  \nCreated')
+    col4.write('Progress')
+    col5.write('Hide')
+    col6.write('Link')
+    first = not cursors and not search
+    # summaries to stream once the rest of the page is on screen: (placeholder, video id, use cache)
+    pending = []
+    retry = st.session_state.pop('retry_summary', None)
+    for video in video_list:
+        with st.container(border=True):
+            col1, col1a, col2, col3, col4, col5, col6 = st.columns([1, 1, 4, 2, 1, 1, 1])
+            if video['thumbnail']:
+                # the local shrunk copy (served by Streamlit), or YouTube's if there is none yet
+                col1.image(thumbnail_store().path(video['thumbnail_file']) or video['thumbnail'])
+            col1.write(video['channel'])
+            col1a.write(video['category'])
+            if search:
+                col2.html(f"<b>{video['title_html']}</b>")
+                if video['snippet_html']:
+                    col2.html(f'<span style="font-size: 0.9rem">{video["snippet_html"]}</span>')
+            else:
+                col2.markdown(f"**{video['title']}**")
+            if video['has_subtitles']:
+                col2_1, col2_2, col2_3, col2_4 = col2.columns([1, 1, 1, 1])
+                if col2_1.checkbox('Subs', key='subs-'+str(video['id'])):
+                    st.html(f'<span style="font-size: 1.2rem">{store.get_video_text(video["id"], "subtitles")}</span>')
+    #             if col2_2.checkbox('Blurb', key='blurb-'+str(video['id'])):
+    #                 st.warning(store.get_video_text(video['id'], 'blurb'))
+                if not first and col2_2.checkbox('Sum', key='summary-'+str(video['id'])):
+                    show_summary(video, pending)
+    #             if col2_4.checkbox('Thm', key='themes-'+str(video['id'])):
+    #                 st.warning(store.get_video_text(video['id'], 'themes'))
+                col2_3.button('Retry', key='retry-summary-'+str(video['id']), on_click=retry_summary, args=(video['id'],))
+                if retry == video['id']:
+                    pending.append((st.empty(), video['id'], False))
+            if video['video_length']:
+                col3.write(video['video_length'])
+            if video['video_created']:
+                col3.write(timeago.format(video['video_created'], now))
+            col4.write(str(video['progress']))
+            col5.checkbox('hidden', value=video['hidden'], key='hidden-'+str(video['id']), on_change=on_change_checkbox, args=(video['id'],), label_visibility='hidden')
+            col6.write('[link](%s)' % video['link'])
+            if first:
+                st.html(f'<span style="font-size: 1.2rem">{store.get_video_text(video["id"], "summary")}</span>')
+                first = False
+
+    col1, col2, col3 = st.columns([1, 1, 4])
+    if cursors:
+        col1.button('Newer', on_click=show_newer_videos)
+    if has_more:
+        col2.button('Older', on_click=show_older_videos, args=(next_cursor,))
+
+    st.markdown('<a href="/?action=import" target="_self">Import New Videos</a>', unsafe_allow_html=True)
+    if config.FEED_CHANNELS or config.FEED_SUBSCRIPTIONS_FILE:
+        st.markdown('<a href="/?action=import_feeds" target="_self">Import From Channel Feeds</a>',
+                    unsafe_allow_html=True)
+    staging = store.staging_status()
+    if staging['staged'] > staging['running']:
+        st.markdown(f'<a href="/?action=resume_import" target="_self">Finish the Unfinished Import '
+                    f"({staging['staged'] - staging['running']} videos)</a>", unsafe_allow_html=True)
+    st.markdown('<a href="/?action=categories" target="_self">Manage Categories</a>', unsafe_allow_html=True)
+    st.markdown('<a href="/?action=classifier" target="_self">Category Classifier</a>', unsafe_allow_html=True)
+    st.markdown('<a href="/?action=stats" target="_self">Stats</a>', unsafe_allow_html=True)
+
+    for placeholder, video_id, use_cache in pending:
+        stream_summary_into(placeholder, video_id, use_cache)
+
+
+def show_summary(video, pending):
+    """Show a video's stored summary, or queue one to be written (streamed) if it has subtitles but no summary yet."""
+    summary = store.get_video_text(video['id'], 'summary')
+    if summary or not video['has_subtitles']:
+        st.html(f'<span style="font-size: 1.2rem">{summary or ""}</span>')
+    else:
+        pending.append((st.empty(), video['id'], True))
+
+
+def retry_summary(video_id):
+    st.session_state['retry_summary'] = video_id
+
+
+def stream_summary_into(placeholder, video_id, use_cache=True):
+    """Summarize a video into `placeholder` as the model writes, then save the summary.
+
+    This runs after the rest of the page is drawn, so the page can be used meanwhile; if
+    a click reruns the script before the summary is finished, nothing is saved.
+    """
+    from summaries import stream_summary
+
+    with placeholder.container():
+        summary = st.write_stream(stream_summary(store.get_video_text(video_id, 'subtitles') or '',
+                                                 config.MAX_TOKENS, use_cache=use_cache))
+    if isinstance(summary, str) and summary.strip():
+        store.update_video(video_id, summary=summary.strip())
+
+
+def on_change_checkbox(id):
+    store.set_hidden(id, st.session_state['hidden-'+str(id)])
+    get_category_counts.clear()
+
+
+def import_home_page(source='home'):
+    """Stage new videos from the home page (in Chrome) or the channel feeds, then import everything staged.
+
+    With source 'staged' only the videos an interrupted import left behind are imported.
+    """
+    import importer
+
+    st.markdown('<a href="/" target="_self">Home</a>', unsafe_allow_html=True)
+
+    if source == 'feeds':
+        with st.spinner('Polling channel feeds...'):
+            result = importer.stage_feeds(st.write)
+        st.write(f"Polled {result['channels']} channel feeds: {result['unchanged']} unchanged, {result['failed']} failed, "
+                 f"{result['videos']} new uploads")
+        st.write(f"{result['known']} already imported, {result['staged']} new")
+    elif source == 'home':
+        driver = importer.open_home_page()
+        status = st.empty()
+        importer.load_feed(driver, lambda seen, known: status.write(f'Scrolled past {seen} videos, last {known} already imported'),
+                           st.write)
+
+        videos = importer.extract_videos(driver, st.write)
+        st.write(f'Found {len(videos)} videos to process')
+        known, staged = importer.stage_videos(videos)
+        st.write(f'{known} already imported, {staged} new')
+
+    import_videos()
+
+    st.markdown('<a href="/" target="_self">Home</a>', unsafe_allow_html=True)
+
+
+def import_videos():
+    """Import the staged videos with a live progress display.
+
+    Videos that are already in the database were left out when the feed was staged, and
+    videos left over from an interrupted import are picked up with the stages they had
+    finished (see importer.import_videos).
+    """
+    import importer
+
+    run, videos = importer.claim_videos()
+    if not videos:
+        st.write('Nothing to import')
+        return
+
+    counts = {name: 0 for name in importer.IMPORT_STAGES}
+    finished = {'count': 0}
+    total = len(videos)
+
+    progress = st.progress(0.0, text='Importing...')
+    status = st.empty()
+
+    def on_event(kind, stage_name, video_data, error):
+        if kind == 'done':
+            counts[stage_name] += 1
+            if stage_name == 'persist':
+                finished['count'] += 1
+                st.write(f"{video_data['title']} - {video_data['category']}")
+        elif kind == 'dropped':
+            finished['count'] += 1
+        else:
+            finished['count'] += 1
+            print(stage_name, video_data, error)
+            st.write(f"Error in {stage_name} for {video_data['link']}: {error}")
+
+        progress.progress(finished['count'] / total if total else 1.0,
+                          text=f"{finished['count']} of {total} videos processed")
+        status.write('  \n'.join(f'{name}: {count}' for name, count in counts.items()))
+
+    importer.import_videos(run, videos, on_event)
+    progress.progress(1.0, text=f"Imported {counts['persist']} new videos")
+    get_category_counts.clear()
+    st.caption('LLM cache: {hits} hits, {misses} misses, {bypassed} bypassed'.format(**llm_cache().stats))
+
+
+def recategorize():
+    """Re-run categorization for visible videos that have no category or are Uncategorized."""
+    from categorize import categorize_videos
+
+    video_list = store.videos_needing_category()
+    st.write(f'Recategorizing {len(video_list)} videos')
+    for start in range(0, len(video_list), config.CATEGORIZE_BATCH_SIZE):
+        batch = video_list[start:start + config.CATEGORIZE_BATCH_SIZE]
+        changes = []
+        for video, category in zip(batch, categorize_videos(batch)):
+            st.write(f"{video['title']} - {category}")
+            if category and category != video['category']:
+                changes.append((video, category))
+        store.update_categories(changes)
+        get_category_counts.clear()
+
+
+def categories():
+    # get all categories
+    st.markdown('<a href="/" target="_self">Home</a>', unsafe_allow_html=True)
+
+    st.header('Categories')
+    st.write('#### Enter a new category name to change the category of all videos in that category.')
+
+    # for each category, st.write category and video count, st.input new category name
+    for category, count in store.category_counts(include_hidden=True):
+        col1, col2, col3 = st.columns([1,1,1])
+        col1.write(f'{category} ({count})')
+        new_category = col2.text_input('Rename category:', key = category, label_visibility="collapsed")
+        if new_category:
+            store.rename_category(category, new_category)
+            get_category_counts.clear()
+
+    st.markdown('<a href="/" target="_self">Home</a>', unsafe_allow_html=True)
+
+
+def classifier_page():
+    st.markdown('<a href="/" target="_self">Home</a>', unsafe_allow_html=True)
+    st.header('Category classifier')
+
+    from categorize import compare_with_llm, train_classifier
+
+    local = classifier()
+    if local is None:
+        st.write('No classifier has been trained yet; every video is categorized by the LLM.')
+    else:
+        st.write(f'Trained on {local.trained_on} videos in {len(local.categories)} categories '
+                 f'{timeago.format(datetime.fromtimestamp(local.trained_at), datetime.now())}.')
+
+    compare_count = st.number_input('Compare with the LLM on this many holdout videos (costs one request each):',
+                                    min_value=0, value=0, step=5)
+    if not st.button('Retrain'):
+        return
+
+    with st.spinner('Training...'):
+        report, holdout = train_classifier()
+    st.write(f"Trained in {report['train_seconds']:.1f}s and saved to {config.CLASSIFIER_PATH}")
+
+    rows = [{'categorizer': 'local', 'videos': report['examples'], 'accuracy': f"{report['accuracy']:.0%}",
+             'confident': f"{report['coverage']:.0%}", 'accuracy when confident': f"{report['confident_accuracy']:.0%}",
+             'ms per video': f"{report['ms_per_video']:.2f}"}]
+    if compare_count:
+        with st.spinner('Asking the LLM...'):
+            llm_report = compare_with_llm(holdout[:compare_count])
+        rows.append({'categorizer': 'llm', 'videos': llm_report['examples'], 'accuracy': f"{llm_report['accuracy']:.0%}",
+                     'confident': '', 'accuracy when confident': '', 'ms per video': f"{llm_report['ms_per_video']:.0f}"})
+    st.table(rows)
+
+
+def jobs_page(kind):
+    st.markdown('<a href="/" target="_self">Home</a>', unsafe_allow_html=True)
+    title, _, where = JOB_KINDS[kind]
+    st.header(title)
+    st.write('Work is queued in the database and done by `python -m youtuber worker`, '
+             'which keeps going when this tab is closed.')
+
+    col1, col2, col3 = st.columns([1, 1, 2])
+    if col1.button('Queue every video that needs this'):
+        st.write(f'Queued {job_queue().enqueue_where(kind, where)} videos')
+    if col2.button('Retry dead jobs'):
+        st.write(f'Requeued {job_queue().requeue_dead(kind)} jobs')
+    show_job_status()
+
+
+@st.fragment(run_every=5)
+def show_job_status():
+    status = job_queue().status()
+    if not status:
+        st.write('No jobs yet.')
+        return
+    st.table([{'kind': kind, **counts} for kind, counts in sorted(status.items())])
+    failures = job_queue().failures()
+    if failures:
+        st.write('Recent failures')
+        st.table([{'job': job_id, 'kind': kind, 'video': video_id, 'state': state, 'attempts': attempts, 'error': error}
+                  for job_id, kind, video_id, state, attempts, error in failures])
+
+
+def indexes_page():
+    st.markdown('<a href="/" target="_self">Home</a>', unsafe_allow_html=True)
+    st.header('Query indexes')
+    st.write('Each query is planned with sequential scans disabled to check that its index applies. On a small '
+             'table PostgreSQL may still prefer a sequential scan, which the last column shows.')
+    rows = store.check_indexes()
+    st.table(rows)
+    failed = [row['query'] for row in rows if not row['ok']]
+    if failed:
+        st.error('Not using their index: ' + ', '.join(failed))
+    else:
+        st.success('Every query uses its index.')
+
+
+def backups_page():
+    from backup import backup_files, recent_backups
+
+    st.markdown('<a href="/" target="_self">Home</a>', unsafe_allow_html=True)
+    st.header('Backups')
+    if backup_scheduler().running:
+        st.info('A backup is being made right now.')
+    st.write(f'Kept in `{config.BACKUP_DIR}`: ' + (', '.join(
+        f'`{path}`' for _, path in backup_files(config.BACKUP_DIR)) or 'none yet'))
+    runs = recent_backups()
+    if runs:
+        st.table(runs)
+
+
+def stats_page():
+    st.markdown('<a href="/" target="_self">Home</a>', unsafe_allow_html=True)
+    st.header('Stats')
+    st.caption('Since this server process started. Workers keep their own; run them with --metrics-port to scrape them.')
+
+    lookups = metrics.counter_total('llm_cache_total', result='hits') + metrics.counter_total('llm_cache_total', result='misses')
+    col1, col2, col3, col4, col5 = st.columns(5)
+    col1.metric('Videos imported', metrics.counter_total('videos_imported_total'))
+    col2.metric('Prompt tokens', f"{metrics.counter_total('llm_tokens_total', kind='prompt'):,}")
+    col3.metric('Completion tokens', f"{metrics.counter_total('llm_tokens_total', kind='completion'):,}")
+    col4.metric('LLM cost', f"${metrics.counter_total('llm_cost_dollars_total'):.4f}")
+    col5.metric('LLM cache hit rate',
+                f"{metrics.counter_total('llm_cache_total', result='hits') / lookups:.0%}" if lookups else '-')
+
+    def ms(seconds):
+        return None if seconds is None else round(seconds * 1000, 1)
+
+    st.subheader('Latency (ms)')
+    st.write('Percentiles are the upper bound of the histogram bucket they fall in.')
+    st.dataframe([{'metric': name, 'labels': ', '.join(f'{k}={v}' for k, v in labels.items()), 'count': count,
+                   'mean': ms(total / count) if count else None, 'p50': ms(p50), 'p95': ms(p95), 'p99': ms(p99),
+                   'total s': round(total, 2)}
+                  for name, labels, count, total, p50, p95, p99 in metrics.histograms()])
+
+    st.subheader('Counters')
+    st.dataframe([{'counter': name, 'labels': ', '.join(f'{k}={v}' for k, v in labels.items()), 'value': value}
+                  for name, labels, value in metrics.counters()])
+
+    st.subheader('LLM usage per video')
+    usage = metrics.video_usage()
+    st.dataframe([{'video': video, 'tokens': amounts.get('llm_tokens_total', 0),
+                   'cost $': round(amounts.get('llm_cost_dollars_total', 0), 5)}
+                  for video, amounts in reversed(usage.items())])
+
+    with st.expander('Prometheus export'):
+        if config.METRICS_PORT:
+            st.write(f'Served at `http://<host>:{config.METRICS_PORT}/metrics`')
+        st.code(metrics.prometheus_text(), language='text')
+
+
+def main():
+    st.set_page_config(layout="wide")
+    backup_scheduler().start()
+    if config.METRICS_PORT:
+        metrics.serve(config.METRICS_PORT)
+
+    action = None
+    try:
+        action = st.query_params['action']
+    except KeyError:
+        action = None
+
+    match action:
+        case 'import':
+            import_home_page()
+        case 'resume_import':
+            import_home_page('staged')
+        case 'import_feeds':
+            import_home_page('feeds')
+        case 'summarize':
+            jobs_page('summary')
+        case 'subs':
+            jobs_page('subtitles')
+        case 'themes':
+            jobs_page('themes')
+        case 'categories':
+            categories()
+        case 'classifier':
+            classifier_page()
+        case 'recategorize':
+            recategorize()
+        case 'indexes':
+            indexes_page()
+        case 'backups':
+            backups_page()
+        case 'stats':
+            stats_page()
+        case _:
+            view_homepage()